@@ -0,0 +1,44 @@
+# app/api/routes/admin.py
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from app.core.result_cache import result_caches
+from app.core.embedding_cache import embedding_cache
+from app.utils.logger import logger
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+def _get_cache(name: str):
+    cache = result_caches.get(name)
+    if cache is None:
+        raise HTTPException(status_code=404, detail=f"Unknown cache: {name}")
+    return cache
+
+@router.get("/cache")
+async def list_caches():
+    """Stats for every cache."""
+    stats = {name: await asyncio.to_thread(cache.stats) for name, cache in result_caches.items()}
+    stats["embeddings"] = embedding_cache.stats()
+    return JSONResponse(content={"success": True, "caches": stats})
+
+@router.get("/cache/{name}")
+async def show_cache(name: str, limit: int = 100):
+    """Stats and most recently used entries of one cache."""
+    cache = _get_cache(name)
+    return JSONResponse(content={
+        "success": True,
+        "stats": await asyncio.to_thread(cache.stats),
+        "entries": await asyncio.to_thread(cache.entries, limit)
+    })
+
+@router.delete("/cache/{name}")
+async def purge_cache(name: str, key: Optional[str] = None):
+    """Purge one entry (`?key=`) or the whole cache."""
+    cache = _get_cache(name)
+    if key is not None:
+        removed = int(await asyncio.to_thread(cache.delete, key))
+    else:
+        removed = await asyncio.to_thread(cache.clear)
+    logger.info(f"🧹 Purged {removed} entries from {name} cache")
+    return JSONResponse(content={"success": True, "removed": removed})
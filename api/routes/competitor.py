@@ -1,33 +1,36 @@
 # app/api/routes/competitor.py
+import time
+import asyncio
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
-from app.models.request_models import CompetitorRequest
+from app.models.request_models import CompetitorRequest, CompetitorBatchRequest
 from app.services.competitor_service import competitor_service
+from app.config import settings
 from app.utils.logger import logger
+from app.utils.sse import format_sse, sse_response
 
 router = APIRouter(prefix="/api/competitor", tags=["Competitor Analysis"])
 
 @router.post("/analyze")
 async def analyze_competitor(request: CompetitorRequest):
     """Analyze competitor website."""
-    logger.info("="*70)
+    logger.debug("="*70)
     logger.info(f"🔍 COMPETITOR ANALYSIS: {request.company_name}")
     
     try:
-        # Scrape website
-        scraped_content = await competitor_service.scrape_website(request.company_url)
-        
-        # Analyze
-        analysis_data = competitor_service.analyze_competitor(
+        # Scrape and analyze
+        result = await competitor_service.analyze_company(
             request.company_name,
-            scraped_content
+            request.company_url
         )
         
-        analysis_data['company_name'] = request.company_name
-        analysis_data['company_url'] = request.company_url
-        
-        logger.info("✅ Competitor analysis completed")
-        return JSONResponse(content={"success": True, "data": analysis_data})
+        logger.info(f"✅ Competitor analysis completed: {result.timing}, cache: {result.cache_status}")
+        return JSONResponse(content={
+            "success": True,
+            "data": result.data,
+            "content_report": result.content_report,
+            "cache_status": result.cache_status,
+        })
         
     except Exception as e:
         logger.error(f"❌ Competitor analysis failed: {e}")
@@ -35,3 +38,55 @@ async def analyze_competitor(request: CompetitorRequest):
             status_code=500,
             content={"success": False, "error": str(e)}
         )
+
+@router.post("/analyze/batch")
+async def analyze_competitors_batch(request: CompetitorBatchRequest):
+    """Analyze several competitors concurrently, streaming each result as it finishes (SSE)."""
+    logger.debug("="*70)
+    logger.info(f"🔍 BATCH COMPETITOR ANALYSIS: {len(request.companies)} companies")
+    
+    if len(request.companies) > settings.COMPETITOR_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {settings.COMPETITOR_BATCH_MAX} companies per batch")
+    
+    async def analyze_one(company: CompetitorRequest) -> dict:
+        try:
+            result = await competitor_service.analyze_company(
+                company.company_name,
+                company.company_url
+            )
+            return {
+                "success": True,
+                "company_name": company.company_name,
+                "data": result.data,
+                "timing": result.timing,
+                "content_report": result.content_report,
+                "cache_status": result.cache_status,
+            }
+        except Exception as e:
+            logger.error(f"❌ Competitor analysis failed for {company.company_name}: {e}")
+            return {"success": False, "company_name": company.company_name, "company_url": company.company_url, "error": str(e)}
+    
+    async def events():
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(analyze_one(company)) for company in request.companies]
+        succeeded = 0
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                succeeded += result["success"]
+                yield format_sse("result", result)
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        summary = {
+            "success": True,
+            "total": len(tasks),
+            "succeeded": succeeded,
+            "failed": len(tasks) - succeeded,
+            "total_seconds": round(time.perf_counter() - started, 3),
+        }
+        logger.info(f"✅ Batch competitor analysis completed: {summary}")
+        yield format_sse("done", summary)
+    
+    return sse_response(events())
@@ -1,17 +1,21 @@
 # app/api/routes/rag.py
+import asyncio
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
 from app.models.request_models import RAGQueryRequest
 from app.services.rag_service import rag_service
+from app.services.answer_cache import answer_cache
 from app.config import settings
 from app.utils.logger import logger
+from app.utils.uploads import save_upload, UploadTooLarge
+from app.utils.sse import format_sse, sse_response
 
 router = APIRouter(prefix="/api/rag", tags=["RAG Analyzer"])
 
 @router.post("/upload")
 async def upload_document(file: UploadFile = File(...)):
     """Upload document for RAG."""
-    logger.info("="*70)
+    logger.debug("="*70)
     logger.info("📄 RAG DOCUMENT UPLOAD")
     
     if not file.filename.endswith('.pdf'):
@@ -20,32 +24,27 @@ async def upload_document(file: UploadFile = File(...)):
     try:
         # Save file
         file_path = settings.UPLOAD_DIR / file.filename
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
+        await save_upload(file, file_path, max_bytes=settings.MAX_UPLOAD_SIZE)
         
-        # Extract text
-        text = await rag_service.extract_text_from_pdf(
-            str(file_path),
-            max_pages=settings.MAX_PAGES_RAG
-        )
-        
-        # Chunk text
-        chunks = rag_service.chunk_text(text)
-        
-        # Create collection
+        # Open collection (kept across re-uploads)
         collection_name = f"user_documents_{file.filename.replace('.pdf', '')}"
-        collection = rag_service.create_collection(collection_name)
+        collection = await asyncio.to_thread(rag_service.create_collection, collection_name)
         
-        # Add documents
-        rag_service.add_documents_to_collection(collection, chunks)
+        # Stream pages through chunking and embedding, re-embedding only changed pages
+        pages = rag_service.iter_pdf_pages(str(file_path), max_pages=settings.MAX_PAGES_RAG)
+        index_stats = await rag_service.index_document(collection, pages)
         
         logger.info("✅ Document uploaded and processed")
         return JSONResponse(content={
             "success": True,
             "collection_name": collection_name,
-            "chunks_created": len(chunks)
+            "chunks_created": index_stats["added"],
+            **index_stats
         })
-        
+    
+    except UploadTooLarge as e:
+        logger.error(f"❌ Document upload rejected: {e}")
+        return JSONResponse(status_code=413, content={"success": False, "error": str(e)})
     except Exception as e:
         logger.error(f"❌ Document upload failed: {e}")
         return JSONResponse(
@@ -55,29 +54,121 @@ async def upload_document(file: UploadFile = File(...)):
 
 @router.post("/query")
 async def query_documents(request: RAGQueryRequest):
-    """Query RAG documents."""
-    logger.info("="*70)
-    logger.info(f"🔍 RAG QUERY: {request.query}")
+    """Query RAG documents in one collection, a list of collections or every collection with a prefix."""
+    logger.debug("="*70)
+    logger.info(f"🔍 RAG QUERY ({len(request.query)} chars): {request.query[:100]!r}")
     
     try:
-        # Query collection
-        context_chunks = rag_service.query_collection(
+        collection_names = await rag_service.resolve_collections(
             request.collection_name,
-            request.query
+            request.collection_names,
+            request.collection_prefix
         )
+        # Keyed on the stored chunk ids, so uploads through other workers miss the cache
+        version = await rag_service.collection_version(collection_names)
+        cache_scope = answer_cache.scope_key(collection_names, version)
+        
+        # Exact repeat of a recent question
+        cached = answer_cache.get_exact(cache_scope, request.query)
+        if cached is not None:
+            logger.info("⚡ RAG answer served from cache (exact)")
+            return JSONResponse(content={
+                "success": True, "answer": cached.answer, "sources": cached.sources, "cached": True, "cache_match": "exact"
+            })
+        
+        # Near-duplicate of a recent question
+        query_embedding = await rag_service.embed_query(request.query)
+        similar = answer_cache.get_similar(cache_scope, query_embedding)
+        if similar is not None:
+            cached, score = similar
+            logger.info(f"⚡ RAG answer served from cache (semantic, similarity {score:.3f})")
+            return JSONResponse(content={
+                "success": True, "answer": cached.answer, "sources": cached.sources, "cached": True, "cache_match": "semantic"
+            })
+        
+        # Query every collection concurrently and merge
+        chunks = await rag_service.query_collections(collection_names, request.query, query_embedding)
+        sources = rag_service.source_attribution(chunks)
         
         # Generate response
-        answer = rag_service.generate_rag_response(request.query, context_chunks)
+        answer = await rag_service.generate_rag_response(request.query, rag_service.format_context(chunks))
+        if answer.complete:
+            answer_cache.put(cache_scope, request.query, query_embedding, answer.text, sources)
         
         logger.info("✅ RAG query completed")
         return JSONResponse(content={
             "success": True,
-            "answer": answer
+            "answer": answer.text,
+            "sources": sources,
+            "cached": False,
+            "cache_match": None
         })
-        
+    
+    except ValueError as e:
+        logger.error(f"❌ RAG query rejected: {e}")
+        return JSONResponse(status_code=400, content={"success": False, "error": str(e)})
     except Exception as e:
         logger.error(f"❌ RAG query failed: {e}")
         return JSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
+
+@router.post("/query/stream")
+async def query_documents_stream(request: RAGQueryRequest):
+    """Query RAG documents, streaming retrieval results, answer tokens and a final event (SSE)."""
+    logger.debug("="*70)
+    logger.info(f"🔍 RAG STREAMING QUERY ({len(request.query)} chars): {request.query[:100]!r}")
+    
+    async def events():
+        try:
+            collection_names = await rag_service.resolve_collections(
+                request.collection_name,
+                request.collection_names,
+                request.collection_prefix
+            )
+            # Keyed on the stored chunk ids, so uploads through other workers miss the cache
+            version = await rag_service.collection_version(collection_names)
+            cache_scope = answer_cache.scope_key(collection_names, version)
+            
+            cached = answer_cache.get_exact(cache_scope, request.query)
+            cache_match = "exact" if cached is not None else None
+            
+            query_embedding = None
+            if cached is None:
+                query_embedding = await rag_service.embed_query(request.query)
+                similar = answer_cache.get_similar(cache_scope, query_embedding)
+                if similar is not None:
+                    cached, cache_match = similar[0], "semantic"
+            
+            if cached is not None:
+                logger.info(f"⚡ RAG answer served from cache ({cache_match})")
+                yield format_sse("done", {
+                    "success": True, "answer": cached.answer, "sources": cached.sources, "cached": True, "cache_match": cache_match
+                })
+                return
+            
+            # Retrieval results go out before generation starts
+            chunks = await rag_service.query_collections(collection_names, request.query, query_embedding)
+            context_chunks = rag_service.format_context(chunks)
+            sources = rag_service.source_attribution(chunks)
+            yield format_sse("retrieval", {"chunks": context_chunks, "sources": sources})
+            
+            stream = rag_service.stream_rag_response(request.query, context_chunks)
+            async for text in stream:
+                yield format_sse("token", {"text": text})
+            
+            # Reached only when the stream ran to its end (errors and disconnects leave above)
+            if stream.complete:
+                answer_cache.put(cache_scope, request.query, query_embedding, stream.text, sources)
+            else:
+                logger.warning("⚠️ Streamed RAG answer empty or cut off, not caching it")
+            
+            logger.info("✅ RAG streaming query completed")
+            yield format_sse("done", {"success": True, "answer": stream.text, "sources": sources, "cached": False, "cache_match": None})
+        
+        except Exception as e:
+            logger.error(f"❌ RAG streaming query failed: {e}")
+            yield format_sse("error", {"success": False, "error": str(e)})
+    
+    return sse_response(events())
@@ -1,19 +1,25 @@
 # app/api/routes/video_pitch.py
 import os
 import uuid
+import asyncio
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
 from app.models.request_models import VideoPitchRequest
+from app.models.analysis_schemas import PitchAnalysis
 from app.services.video_service import video_service
+from app.services.gemini_service import gemini_service
+from app.services.job_service import job_service
 from app.config import settings
 from app.utils.logger import logger
+from app.utils.sse import format_sse, sse_response
+from app.utils.uploads import save_upload, UploadTooLarge
 
 router = APIRouter(prefix="/api/video-pitch", tags=["Video Pitch"])
 
 @router.post("/analyze")
 async def analyze_youtube_video(request: VideoPitchRequest):
     """Analyze YouTube video pitch."""
-    logger.info("="*70)
+    logger.debug("="*70)
     logger.info("🎬 YOUTUBE VIDEO ANALYSIS REQUEST")
     
     try:
@@ -23,15 +29,16 @@ async def analyze_youtube_video(request: VideoPitchRequest):
             raise HTTPException(status_code=400, detail="Invalid YouTube URL")
         
         # Get transcript
-        transcript = video_service.get_youtube_transcript(video_id)
+        segments = await video_service.get_youtube_segments(video_id)
+        transcript = video_service.segments_text(segments)
         
         # Analyze transcript
-        analysis_data = video_service.analyze_transcript(transcript)
+        analysis_data = await video_service.analyze_transcript(transcript, segments)
         analysis_data['youtube_url'] = request.youtube_url
         
         logger.info("✅ YouTube video analysis completed")
         return JSONResponse(content={"success": True, "data": analysis_data})
-        
+    
     except Exception as e:
         logger.error(f"❌ YouTube analysis failed: {e}")
         return JSONResponse(
@@ -39,44 +46,150 @@ async def analyze_youtube_video(request: VideoPitchRequest):
             content={"success": False, "error": str(e)}
         )
 
+@router.post("/analyze/stream")
+async def analyze_youtube_video_stream(request: VideoPitchRequest):
+    """Analyze YouTube video pitch, streaming transcript status, analysis tokens and the parsed result (SSE)."""
+    logger.debug("="*70)
+    logger.info("🎬 YOUTUBE VIDEO STREAMING ANALYSIS REQUEST")
+    
+    video_id = video_service.extract_video_id(request.youtube_url)
+    if not video_id:
+        raise HTTPException(status_code=400, detail="Invalid YouTube URL")
+    
+    async def events():
+        try:
+            segments = await video_service.get_youtube_segments(video_id)
+            transcript = video_service.segments_text(segments)
+            yield format_sse("transcript", {"video_id": video_id, "characters": len(transcript)})
+            
+            analysis_data = await video_service.get_cached_analysis(transcript)
+            if analysis_data is not None:
+                analysis_data['youtube_url'] = request.youtube_url
+                logger.info("⚡ YouTube analysis served from cache")
+                yield format_sse("done", {"success": True, "data": analysis_data, "cached": True})
+                return
+            
+            if video_service.needs_map_reduce(transcript):
+                # Long transcripts are summarized window by window; there is no single stream to relay
+                analysis_data = await video_service.analyze_transcript(transcript, segments)
+                analysis_data['youtube_url'] = request.youtube_url
+                logger.info("✅ YouTube video streaming analysis completed (map-reduce)")
+                yield format_sse("done", {"success": True, "data": analysis_data, "cached": False})
+                return
+            
+            parts = []
+            async for text in video_service.stream_transcript_analysis(transcript):
+                parts.append(text)
+                yield format_sse("token", {"text": text})
+            
+            try:
+                output = gemini_service.parse_structured("".join(parts), PitchAnalysis)
+                analysis_data = output.data
+                if not output.repaired:
+                    await video_service.cache_analysis(transcript, analysis_data)
+            except ValueError as e:
+                # Regenerate without the stream; the transcript is reused as is
+                logger.warning(f"⚠️ Streamed analysis malformed, regenerating: {e}")
+                analysis_data = await video_service.analyze_transcript(transcript, segments)
+            analysis_data['youtube_url'] = request.youtube_url
+            
+            logger.info("✅ YouTube video streaming analysis completed")
+            yield format_sse("done", {"success": True, "data": analysis_data, "cached": False})
+        
+        except Exception as e:
+            logger.error(f"❌ YouTube streaming analysis failed: {e}")
+            yield format_sse("error", {"success": False, "error": str(e)})
+    
+    return sse_response(events())
+
 @router.post("/upload")
 async def analyze_uploaded_video(file: UploadFile = File(...)):
     """Analyze uploaded video file."""
-    logger.info("="*70)
+    logger.debug("="*70)
     logger.info("📤 VIDEO UPLOAD ANALYSIS REQUEST")
     
     file_id = str(uuid.uuid4())
     video_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.mp4")
-    audio_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.mp3")
     
     try:
-        # Save video
-        with open(video_path, "wb") as f:
-            f.write(await file.read())
-        
-        # Extract audio
-        if not await video_service.extract_audio_from_video(video_path, audio_path):
-            raise Exception("Failed to extract audio from video")
+        # Save video (a rejected or failed save removes its partial file)
+        upload = await save_upload(file, video_path, max_bytes=settings.MAX_VIDEO_UPLOAD_SIZE)
         
-        # Transcribe
-        transcript = await video_service.transcribe_audio(audio_path)
-        
-        # Analyze
-        analysis_data = video_service.analyze_transcript(transcript)
-        analysis_data['filename'] = file.filename
+        # Transcribe straight from the video and analyze; the pipeline deletes the upload
+        analysis_data = await video_service.process_uploaded_video(
+            video_path, file.filename, sha256=upload.sha256
+        )
         
         logger.info("✅ Video upload analysis completed")
         return JSONResponse(content={"success": True, "data": analysis_data})
-        
+    
+    except UploadTooLarge as e:
+        logger.error(f"❌ Video upload rejected: {e}")
+        return JSONResponse(status_code=413, content={"success": False, "error": str(e)})
     except Exception as e:
         logger.error(f"❌ Video upload failed: {e}")
         return JSONResponse(
             status_code=500,
             content={"success": False, "error": str(e)}
         )
-    finally:
-        # Cleanup
+
+@router.post("/jobs", status_code=202)
+async def submit_video_job(file: UploadFile = File(...)):
+    """Queue an uploaded video for background analysis and return its job id."""
+    logger.debug("="*70)
+    logger.info("📤 VIDEO UPLOAD JOB REQUEST")
+    
+    file_id = str(uuid.uuid4())
+    video_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.mp4")
+    job = job_service.create("video_upload", {"filename": file.filename})
+    
+    try:
+        async with job.stage("upload"):
+            upload = await save_upload(file, video_path, max_bytes=settings.MAX_VIDEO_UPLOAD_SIZE)
+        
+        job_service.enqueue(job, run_video_job, video_path, file.filename, upload.sha256)
+    
+    except Exception as e:
+        logger.error(f"❌ Video job submission failed: {e}")
+        job.status = "failed"
+        job.error = str(e)
+        job.touch()
         if os.path.exists(video_path):
             os.remove(video_path)
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
+        if isinstance(e, UploadTooLarge):
+            status_code = 413
+        elif isinstance(e, asyncio.QueueFull):
+            status_code = 503
+        else:
+            status_code = 500
+        return JSONResponse(
+            status_code=status_code,
+            content={"success": False, "job_id": job.id, "error": str(e) or "Job queue is full"}
+        )
+    
+    logger.info(f"📥 Video job queued: {job.id}")
+    return JSONResponse(status_code=202, content={"success": True, "job_id": job.id, "status": job.status})
+
+@router.get("/jobs/{job_id}")
+async def get_video_job(job_id: str):
+    """Fetch the state, per-stage progress and result of a video job."""
+    job = await job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JSONResponse(content={"success": True, "job": job})
+
+@router.get("/jobs/{job_id}/events")
+async def stream_video_job(job_id: str):
+    """Stream video job progress updates until it finishes (SSE)."""
+    if await job_service.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        async for snapshot in job_service.watch(job_id):
+            yield format_sse("job", snapshot)
+    
+    return sse_response(events())
+
+async def run_video_job(job, video_path: str, filename: str, sha256: str) -> dict:
+    """Job handler for an uploaded video."""
+    return await video_service.process_uploaded_video(video_path, filename, job=job, sha256=sha256)
@@ -0,0 +1,106 @@
+# app/benchmarks/context_eval.py
+"""
+Eval: prompt context tokens with plain chunk joining vs. the ContextAssembler.
+
+Run from the directory containing the `app` package:
+
+    python -m app.benchmarks.context_eval --top-k 3 6
+
+The labelled pitch-deck passages are laid out as a multi-page document,
+chunked with the app's CHUNK_SIZE/CHUNK_OVERLAP and retrieved with the
+hybrid retriever. "coverage" is the share of relevant passages that are
+fully present in the context; it should not drop when tokens do.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import textwrap
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+
+import chromadb
+from app.benchmarks.stubs import bow_embedding
+from app.benchmarks.retrieval_eval import EVAL_SET
+from app.config import settings
+from app.services.context_assembler import ContextAssembler
+from app.services.rag_service import RAGService
+from app.services.retriever import HybridRetriever
+from app.utils.tokens import estimate_tokens
+
+PARAGRAPHS_PER_PAGE = 5
+
+def build_pages(chunks: dict):
+    """
+    Lay the passages out as pages the way PDF extraction returns them:
+    paragraphs padded to a realistic length and wrapped into short lines.
+    """
+    paragraphs = []
+    for i, text in enumerate(chunks.values()):
+        filler = (
+            f" Note {i}: figures in this section are unaudited, rounded for presentation"
+            f" and reflect management estimates as of the date of deck revision {i % 4 + 1}."
+        )
+        paragraphs.append("\n".join(textwrap.wrap(text + filler * 3, width=90)))
+    return [
+        "\n".join(paragraphs[i:i + PARAGRAPHS_PER_PAGE])
+        for i in range(0, len(paragraphs), PARAGRAPHS_PER_PAGE)
+    ]
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+async def run(top_ks, budget: int):
+    eval_set = json.loads(EVAL_SET.read_text())
+    pages = build_pages(eval_set["chunks"])
+    
+    chunks, carry = [], ""
+    for page_num, text in enumerate(pages, start=1):
+        chunks.extend(RAGService.chunk_page(page_num, text, carry))
+        carry = (carry + text)[-settings.CHUNK_OVERLAP:]
+    
+    collection = chromadb.EphemeralClient().get_or_create_collection(name=f"context_eval_{int(time.time())}")
+    collection.add(
+        ids=[chunk["id"] for chunk in chunks],
+        documents=[chunk["text"] for chunk in chunks],
+        embeddings=[bow_embedding(chunk["text"]) for chunk in chunks],
+        metadatas=[chunk["metadata"] for chunk in chunks]
+    )
+    retriever = HybridRetriever()
+    assembler = ContextAssembler()
+    
+    print(f"pages: {len(pages)}   chunks: {len(chunks)}   queries: {len(eval_set['queries'])}   budget: {budget} tokens")
+    print()
+    print(f"{'top_k':<8}{'plain tok':>12}{'assembled':>12}{'saved':>10}{'cov plain':>12}{'cov asm':>10}")
+    for top_k in top_ks:
+        plain_tokens, assembled_tokens, plain_cov, assembled_cov = [], [], [], []
+        for item in eval_set["queries"]:
+            result = await retriever.retrieve(collection, item["query"], bow_embedding(item["query"]), top_k=top_k)
+            plain = normalize("\n\n".join(chunk.text for chunk in result.chunks))
+            context = assembler.assemble(result.chunks, budget)
+            assembled = normalize("\n\n".join(span.text for span in context.spans))
+            
+            plain_tokens.append(estimate_tokens(plain))
+            assembled_tokens.append(context.tokens_out)
+            relevant = [normalize(eval_set["chunks"][key]) for key in item["relevant"]]
+            plain_cov.append(statistics.mean(passage in plain for passage in relevant))
+            assembled_cov.append(statistics.mean(passage in assembled for passage in relevant))
+        
+        plain_mean, assembled_mean = statistics.mean(plain_tokens), statistics.mean(assembled_tokens)
+        print(
+            f"{top_k:<8}{plain_mean:>12.0f}{assembled_mean:>12.0f}{1 - assembled_mean / plain_mean:>10.1%}"
+            f"{statistics.mean(plain_cov):>12.3f}{statistics.mean(assembled_cov):>10.3f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[3, 6])
+    parser.add_argument("--budget", type=int, default=4000, help="context token budget")
+    args = parser.parse_args()
+    asyncio.run(run(args.top_k, args.budget))
+
+if __name__ == "__main__":
+    main()
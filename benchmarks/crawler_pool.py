@@ -0,0 +1,69 @@
+# app/benchmarks/crawler_pool.py
+"""
+Benchmark: scraping N sites with a browser launch per request vs. the shared CrawlerPool.
+
+Serves static company sites from a local HTTP server, so no network access
+is needed (a Playwright browser must be installed for crawl4ai).
+
+    python -m app.benchmarks.crawler_pool --companies 10 --pool-size 4
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+
+from crawl4ai import AsyncWebCrawler
+from app.benchmarks.local_site import LocalSite
+from app.services.crawler_pool import CrawlerPool
+
+async def scrape_fresh(urls):
+    """Original behaviour: launch a browser for every URL, one request at a time."""
+    for url in urls:
+        async with AsyncWebCrawler(verbose=False) as crawler:
+            await crawler.arun(url=url)
+
+async def scrape_pooled(urls, pool: CrawlerPool):
+    timings = []
+    
+    async def one(url):
+        start = time.perf_counter()
+        await pool.fetch(url)
+        timings.append(time.perf_counter() - start)
+    
+    await asyncio.gather(*[one(url) for url in urls])
+    return timings
+
+async def run(companies: int, pool_size: int, per_domain: int):
+    with LocalSite(companies) as site:
+        urls = [site.company_url(i) for i in range(companies)]
+        
+        start = time.perf_counter()
+        await scrape_fresh(urls)
+        fresh = time.perf_counter() - start
+        
+        pool = CrawlerPool(size=pool_size, per_domain=per_domain)
+        await pool.start()
+        try:
+            start = time.perf_counter()
+            timings = await scrape_pooled(urls, pool)
+            pooled = time.perf_counter() - start
+        finally:
+            await pool.close()
+    
+    print(f"sites:                 {companies}")
+    print(f"browser per request:   {fresh:.2f}s")
+    print(f"pool (size={pool_size}, per-domain={per_domain}): {pooled:.2f}s")
+    print(f"per-site p50/max:      {sorted(timings)[len(timings) // 2]:.2f}s / {max(timings):.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--companies", type=int, default=10)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--per-domain", type=int, default=4, help="all local sites share one host")
+    args = parser.parse_args()
+    asyncio.run(run(args.companies, args.pool_size, args.per_domain))
+
+if __name__ == "__main__":
+    main()
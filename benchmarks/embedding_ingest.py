@@ -0,0 +1,66 @@
+# app/benchmarks/embedding_ingest.py
+"""
+Benchmark: serial 10-chunk embedding loop vs. the concurrent EmbeddingBatcher.
+
+Run from the directory containing the `app` package:
+
+    python -m app.benchmarks.embedding_ingest --chunks 200 --latency 0.2
+
+Both runs use batches of --batch-size so the only difference is concurrency:
+the serial loop takes about batches x latency, the batcher about
+latency x batches / concurrency.
+"""
+import argparse
+import asyncio
+import math
+import os
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+
+from app.benchmarks.stubs import fake_embedding
+from app.services.embedding_batcher import EmbeddingBatcher
+
+def make_embed_fn(latency: float):
+    async def embed(batch):
+        await asyncio.sleep(latency)
+        return [fake_embedding(text) for text in batch]
+    return embed
+
+async def run(n_chunks: int, latency: float, batch_size: int, concurrency: int):
+    chunks = [f"chunk {i} " + "lorem ipsum " * 100 for i in range(n_chunks)]
+    embed = make_embed_fn(latency)
+    n_batches = math.ceil(n_chunks / batch_size)
+    
+    start = time.perf_counter()
+    for i in range(0, n_chunks, batch_size):
+        await embed(chunks[i:i + batch_size])
+    serial = time.perf_counter() - start
+    
+    written = []
+    
+    async def on_batch(indices, embeddings):
+        written.append(len(indices))
+    
+    batcher = EmbeddingBatcher(max_items=batch_size, concurrency=concurrency)
+    start = time.perf_counter()
+    await batcher.embed(chunks, embed, on_batch=on_batch)
+    concurrent = time.perf_counter() - start
+    
+    print(f"chunks / batches:     {n_chunks} / {n_batches}")
+    print(f"serial loop:          {serial:.3f}s (expected ~{n_batches * latency:.3f}s)")
+    print(f"batcher (x{concurrency}):         {concurrent:.3f}s (expected ~{math.ceil(n_batches / concurrency) * latency:.3f}s)")
+    print(f"speedup:              {serial / concurrent:.1f}x")
+    print(f"batches written:      {len(written)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(run(args.chunks, args.latency, args.batch_size, args.concurrency))
+
+if __name__ == "__main__":
+    main()
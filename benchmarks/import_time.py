@@ -0,0 +1,93 @@
+# app/benchmarks/import_time.py
+"""
+Benchmark: how long `import app.main` takes (what every worker start,
+reload and test import pays), via `python -X importtime`.
+
+Run from the directory containing the `app` package:
+
+    python -m app.benchmarks.import_time --runs 5
+    python -m app.benchmarks.import_time --save import_baseline.json
+    python -m app.benchmarks.import_time --baseline import_baseline.json --tolerance 0.2
+
+Each run is a fresh interpreter. Reports the median total and the packages
+contributing the most self time; with --baseline, exits non-zero when the
+median total regressed by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+LINE_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure(module: str):
+    """One cold import in a fresh interpreter: (total seconds, self seconds per top-level package)."""
+    env = dict(os.environ)
+    env.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    
+    total = 0
+    by_package = Counter()
+    for line in result.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        by_package[name.split(".")[0]] += int(self_us)
+        if name == module:
+            total = int(cumulative_us)
+    return total / 1e6, {name: us / 1e6 for name, us in by_package.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Packages to list by self time")
+    parser.add_argument("--save", type=Path, help="Write the result as a baseline JSON file")
+    parser.add_argument("--baseline", type=Path, help="Compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+    
+    totals = []
+    packages = Counter()
+    for _ in range(args.runs):
+        total, by_package = measure(args.module)
+        totals.append(total)
+        packages.update(by_package)
+    
+    median = statistics.median(totals)
+    print(f"import {args.module}: median {median * 1000:.0f}ms "
+          f"(min {min(totals) * 1000:.0f}ms, max {max(totals) * 1000:.0f}ms, {args.runs} runs)")
+    print("\nself time by package (mean per run):")
+    for name, seconds in packages.most_common(args.top):
+        print(f"  {name:<28} {seconds / args.runs * 1000:8.1f}ms")
+    
+    result = {
+        "module": args.module,
+        "median_seconds": round(median, 4),
+        "packages": {name: round(seconds / args.runs, 4) for name, seconds in packages.most_common(args.top)}
+    }
+    if args.save:
+        args.save.write_text(json.dumps(result, indent=2))
+        print(f"\nbaseline saved to {args.save}")
+    
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        change = median / baseline["median_seconds"] - 1
+        print(f"\nvs baseline {baseline['median_seconds'] * 1000:.0f}ms: {change:+.0%}")
+        if change > args.tolerance:
+            print(f"import time regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+# app/benchmarks/load_suite.py
+"""
+Offline end-to-end load benchmark. It drives the FastAPI app with every
+remote backend replaced by a deterministic local stub: Gemini, the crawler,
+YouTube transcripts and Whisper. For each endpoint it reports p50/p95/p99
+latency, requests/sec and peak RSS.
+
+Run from the directory containing the `app` package:
+
+    python -m app.benchmarks.load_suite --requests 40 --concurrency 8
+    python -m app.benchmarks.load_suite --scenarios rag_query competitor_analyze
+    python -m app.benchmarks.load_suite --save       # write benchmarks/data/load_baseline.json
+    python -m app.benchmarks.load_suite --compare    # exit 1 on regressions vs the baseline
+
+Caches, Chroma, uploads and jobs are kept in a temp directory. Every request
+uses fresh inputs, so caches don't hide the work. The video upload scenario
+needs the FFmpeg binary and faster-whisper (for silence detection), and is
+skipped without them.
+"""
+import argparse
+import asyncio
+import importlib.util
+import io
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+
+import fitz
+import httpx
+import numpy as np
+from app.config import settings
+
+BASELINE = Path(__file__).parent / "data" / "load_baseline.json"
+CORPUS_COLLECTION = "user_documents_bench_corpus"
+
+def isolate_storage(root: Path):
+    """Point every on-disk store at `root`; must run before the services are imported."""
+    settings.UPLOAD_DIR = root / "uploads"
+    settings.CHROMA_DB_PATH = root / "chroma_db"
+    settings.EMBEDDING_CACHE_PATH = root / "embedding_cache.sqlite3"
+    settings.RESULT_CACHE_PATH = root / "result_cache.sqlite3"
+    settings.JOB_STORE_DIR = root / "jobs"
+    settings.LOG_FILE = root / "app.log"
+    settings.UPLOAD_DIR.mkdir()
+    settings.CHROMA_DB_PATH.mkdir()
+
+def install_stubs(args):
+    """Swap the remote backends for stubs and return the app."""
+    from app.benchmarks import stubs
+    from app.core import clients
+    from app.services import crawler_pool as crawler_pool_module
+    from app.services import video_service as video_service_module
+    from app.services.transcription_engine import transcription_engine
+    
+    clients.async_gemini_client.client = stubs.StubGeminiClient(args.generate_latency, args.embed_latency)
+    
+    stubs.StubCrawler.latency = args.crawl_latency
+    crawler_pool_module.AsyncWebCrawler = stubs.StubCrawler
+    
+    stubs.StubTranscriptApi.latency = args.transcript_latency
+    video_service_module.YouTubeTranscriptApi = stubs.StubTranscriptApi
+    
+    for _ in range(transcription_engine.workers):
+        transcription_engine._models.put(stubs.StubWhisperModel(rtf=args.whisper_rtf))
+    transcription_engine.pool.set(
+        ThreadPoolExecutor(max_workers=transcription_engine.workers, thread_name_prefix="whisper")
+    )
+    
+    from app.main import app
+    logging.getLogger("ai_analyst").setLevel(logging.WARNING)
+    return app
+
+def synthetic_pdf(seed: int, pages: int) -> bytes:
+    """A text-heavy pitch-deck PDF whose text is unique per seed."""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        lines = [
+            f"Deck {seed} page {page_num} line {i}: revenue grew {(seed + i) % 90}% "
+            f"with ARR of ${(seed * 7 + i) * 1000} and {i % 12} months of runway."
+            for i in range(50)
+        ]
+        page.insert_text((36, 36), "\n".join(lines), fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def synthetic_audio(seed: int, seconds: float, sample_rate: int = 16000) -> bytes:
+    """WAV audio of tone bursts separated by silences, so VAD finds segment boundaries."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = 0.3 * np.sin(2 * np.pi * (180 + seed % 50) * t)
+    speaking = (t % 4.0) < 3.0  # 3s "speech", 1s pause
+    samples = (tone * speaking * 32767).astype(np.int16)
+    
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+class RSSSampler:
+    """Samples this process's resident set size in the background and keeps the peak."""
+    
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    @staticmethod
+    def current() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # No /proc: fall back to the lifetime peak (kB on Linux, bytes on macOS)
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval)
+    
+    def __enter__(self) -> "RSSSampler":
+        self.peak = self.current()
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    build: Callable[[int], dict]  # request index -> httpx request kwargs
+    setup: Optional[Callable[[httpx.AsyncClient], Awaitable[None]]] = None
+    missing: Optional[Callable[[], Optional[str]]] = None  # why the scenario can't run here, if it can't
+
+def build_scenarios(args) -> List[Scenario]:
+    run_id = int(time.time())
+    
+    async def upload_corpus(client: httpx.AsyncClient):
+        files = {"file": ("bench_corpus.pdf", synthetic_pdf(0, args.pdf_pages), "application/pdf")}
+        response = await client.post("/api/rag/upload", files=files)
+        response.raise_for_status()
+    
+    def query(kind: str) -> Callable[[int], dict]:
+        # Distinct questions per scenario and request, so the answer cache never matches
+        def build(i: int) -> dict:
+            question = f"What was revenue growth and runway in deck line {i} ({kind} {run_id})?"
+            return {"json": {"query": question, "collection_name": CORPUS_COLLECTION}}
+        return build
+    
+    def upload_missing() -> Optional[str]:
+        if not shutil.which("ffmpeg"):
+            return "ffmpeg binary not found"
+        if importlib.util.find_spec("faster_whisper") is None:
+            return "faster-whisper not installed (needed for silence detection)"
+        return None
+    
+    return [
+        Scenario(
+            "rag_upload", "POST", "/api/rag/upload",
+            lambda i: {"files": {"file": (f"bench_{run_id}_{i}.pdf", synthetic_pdf(run_id + i, args.pdf_pages), "application/pdf")}}
+        ),
+        Scenario("rag_query", "POST", "/api/rag/query", query("query"), setup=upload_corpus),
+        Scenario("rag_query_stream", "POST", "/api/rag/query/stream", query("stream"), setup=upload_corpus),
+        Scenario(
+            "youtube_analyze", "POST", "/api/video-pitch/analyze",
+            lambda i: {"json": {"youtube_url": f"https://www.youtube.com/watch?v=m{args.video_minutes}x{run_id}{i}"}}
+        ),
+        Scenario(
+            "youtube_analyze_long", "POST", "/api/video-pitch/analyze",
+            lambda i: {"json": {"youtube_url": f"https://www.youtube.com/watch?v=m{args.long_video_minutes}x{run_id}{i}"}}
+        ),
+        Scenario(
+            "youtube_analyze_stream", "POST", "/api/video-pitch/analyze/stream",
+            lambda i: {"json": {"youtube_url": f"https://www.youtube.com/watch?v=m{args.video_minutes}x{run_id}s{i}"}}
+        ),
+        Scenario(
+            "competitor_analyze", "POST", "/api/competitor/analyze",
+            lambda i: {"json": {"company_name": f"Bench Co {i}", "company_url": f"https://bench-{run_id}-{i}.example.com"}}
+        ),
+        Scenario(
+            "video_upload", "POST", "/api/video-pitch/upload",
+            lambda i: {"files": {"file": (f"pitch_{i}.mp4", synthetic_audio(run_id + i, args.audio_seconds), "video/mp4")}},
+            missing=upload_missing
+        ),
+    ]
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(p / 100 * len(sorted_values)) - 1))]
+
+def failed(response: httpx.Response) -> bool:
+    if response.status_code >= 400:
+        return True
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        return b"event: error" in response.content
+    return False
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, n_requests: int, concurrency: int) -> dict:
+    if scenario.setup:
+        await scenario.setup(client)
+    # Build payloads up front so PDF/audio generation is not timed
+    payloads = [scenario.build(i) for i in range(n_requests)]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    
+    async def one(kwargs: dict):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(scenario.method, scenario.path, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if failed(response):
+                errors += 1
+    
+    with RSSSampler() as rss:
+        started = time.perf_counter()
+        await asyncio.gather(*[one(kwargs) for kwargs in payloads])
+        wall = time.perf_counter() - started
+    
+    latencies.sort()
+    return {
+        "requests": n_requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "rps": round(n_requests / wall, 2),
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+    }
+
+async def run(args) -> Dict[str, dict]:
+    app = install_stubs(args)
+    from app.services.crawler_pool import crawler_pool
+    from app.services.pdf_extractor import pdf_extractor
+    
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for scenario in build_scenarios(args):
+                if args.scenarios and scenario.name not in args.scenarios:
+                    continue
+                reason = scenario.missing() if scenario.missing else None
+                if reason:
+                    print(f"{scenario.name:<24} skipped: {reason}")
+                    continue
+                result = await run_scenario(client, scenario, args.requests, args.concurrency)
+                results[scenario.name] = result
+                print(
+                    f"{scenario.name:<24} p50 {result['p50_ms']:8.1f}ms  p95 {result['p95_ms']:8.1f}ms  "
+                    f"p99 {result['p99_ms']:8.1f}ms  {result['rps']:7.2f} req/s  "
+                    f"peak RSS {result['peak_rss_mb']:7.1f}MB  errors {result['errors']}"
+                )
+    finally:
+        await crawler_pool.close()
+        pdf_extractor.shutdown()
+    return results
+
+def compare(results: Dict[str, dict], baseline: dict, config: dict, tolerance: float) -> bool:
+    """Print the change per scenario; True when any p95 or throughput regressed past the tolerance."""
+    if baseline.get("config") != config:
+        print("⚠️  stub latencies or load differ from the baseline; the comparison is indicative only")
+    regressed = False
+    print(f"\n{'scenario':<24} {'p95 change':>11} {'req/s change':>13}")
+    for name, result in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            print(f"{name:<24} {'(new)':>11}")
+            continue
+        p95_change = result["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        rps_change = result["rps"] / base["rps"] - 1 if base["rps"] else 0.0
+        flag = ""
+        if p95_change > tolerance or rps_change < -tolerance or result["errors"] > base["errors"]:
+            regressed = True
+            flag = "  <-- regression"
+        print(f"{name:<24} {p95_change:>+11.1%} {rps_change:>+13.1%}{flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--scenarios", nargs="+", help="Run only these scenarios")
+    parser.add_argument("--generate-latency", type=float, default=0.2)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    parser.add_argument("--crawl-latency", type=float, default=0.1)
+    parser.add_argument("--transcript-latency", type=float, default=0.05)
+    parser.add_argument("--whisper-rtf", type=float, default=0.05, help="Stub Whisper seconds per second of audio")
+    parser.add_argument("--pdf-pages", type=int, default=10)
+    parser.add_argument("--video-minutes", type=int, default=10)
+    parser.add_argument("--long-video-minutes", type=int, default=40)
+    parser.add_argument("--audio-seconds", type=float, default=60.0)
+    parser.add_argument("--save", nargs="?", type=Path, const=BASELINE, help="Write results as the baseline")
+    parser.add_argument("--compare", nargs="?", type=Path, const=BASELINE, help="Compare against a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p95 / throughput change (0.25 = 25%%)")
+    args = parser.parse_args()
+    
+    config = {
+        key: getattr(args, key) for key in (
+            "requests", "concurrency", "generate_latency", "embed_latency", "crawl_latency",
+            "transcript_latency", "whisper_rtf", "pdf_pages", "video_minutes", "long_video_minutes", "audio_seconds"
+        )
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        isolate_storage(Path(tmp))
+        print(f"cpu count: {os.cpu_count()}, requests: {args.requests}, concurrency: {args.concurrency}\n")
+        results = asyncio.run(run(args))
+    
+    if args.save:
+        report = {
+            "config": config,
+            "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+            "scenarios": results,
+        }
+        args.save.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nbaseline saved to {args.save}")
+    
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if compare(results, baseline, config, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# app/benchmarks/local_site.py
+"""Static multi-company website served from a temp directory on localhost."""
+import functools
+import http.server
+import tempfile
+import threading
+from pathlib import Path
+
+PAGES = {
+    "index.html": "<h1>{name}</h1><nav>Home | Pricing | Features | About</nav><p>{name} builds analytics software for finance teams.</p>",
+    "pricing/index.html": "<h1>{name} Pricing</h1><p>Starter $49/month. Growth $199/month. Enterprise: contact sales.</p>",
+    "features/index.html": "<h1>{name} Features</h1><ul><li>Dashboards</li><li>Forecasting</li><li>SSO</li></ul>",
+    "about/index.html": "<h1>About {name}</h1><p>Founded in 2019, Series A in 2023, 40 employees.</p>",
+}
+FOOTER = "<footer>© {name}. Privacy | Terms | Careers | Contact</footer>"
+
+class LocalSite:
+    """Serves /company-<i>/ sites (index, pricing, features, about) on 127.0.0.1."""
+    
+    def __init__(self, companies: int = 10):
+        self.companies = companies
+        self._tmp = tempfile.TemporaryDirectory()
+        self._server = None
+        self._thread = None
+    
+    def __enter__(self) -> "LocalSite":
+        root = Path(self._tmp.name)
+        for i in range(self.companies):
+            name = f"Company {i}"
+            for rel_path, body in PAGES.items():
+                path = root / f"company-{i}" / rel_path
+                path.parent.mkdir(parents=True, exist_ok=True)
+                html = f"<html><body>{body.format(name=name)}{FOOTER.format(name=name)}</body></html>"
+                path.write_text(html)
+        
+        handler = functools.partial(QuietHandler, directory=str(root))
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        self._tmp.cleanup()
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+    
+    def company_url(self, i: int) -> str:
+        return f"{self.base_url}/company-{i}/"
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
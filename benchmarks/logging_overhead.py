@@ -0,0 +1,132 @@
+# app/benchmarks/logging_overhead.py
+"""
+Benchmark: how long logging blocks the event loop, comparing the old
+synchronous FileHandler + StreamHandler setup with the queue pipeline
+(QueueHandler on the loop, batched writes on a background thread).
+
+Run from the directory containing the `app` package:
+
+    python -m app.benchmarks.logging_overhead --tasks 200 --lines 50 --pause 0.002
+
+Each of --tasks coroutines logs --lines request-style lines, awaiting --pause
+seconds between them (standing in for model and database calls), while a
+monitor task measures event-loop lag. Reports the cost of each logging
+call, total time spent inside logging calls, and loop lag, next to a run
+with logging disabled (the lag the load causes by itself).
+Console output goes to os.devnull, and log files to a temporary directory.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+
+from app.utils.logger import JSONFormatter, build_handlers, create_queue_pipeline
+
+QUERY = "What were the main revenue drivers last quarter, and how do they compare with the previous year? " * 3
+
+def sync_logger(log_file: Path, console) -> logging.Logger:
+    """The previous setup_logger: plain handlers that write and flush on the calling thread."""
+    logger = logging.getLogger("bench.sync")
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(JSONFormatter())
+    console_handler = logging.StreamHandler(console)
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
+    return logger
+
+def queued_logger(log_file: Path, console, batch_size: int):
+    logger = logging.getLogger("bench.queued")
+    handlers = build_handlers(log_file)
+    handlers[1].setStream(console)
+    queue_handler, listener = create_queue_pipeline(handlers, batch_size=batch_size)
+    logger.addHandler(queue_handler)
+    listener.start()
+    return logger, listener
+
+async def run_load(logger: logging.Logger, n_tasks: int, n_lines: int, pause: float):
+    """(per-call seconds, loop lag samples in seconds)."""
+    calls = []
+    lags = []
+    done = asyncio.Event()
+    
+    async def monitor(interval: float = 0.001):
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, time.perf_counter() - started - interval))
+    
+    async def request(task_id: int):
+        for line in range(n_lines):
+            started = time.perf_counter()
+            if line % 10 == 0:
+                logger.info("=" * 70)
+            logger.info(f"🔍 RAG QUERY ({len(QUERY)} chars): {QUERY[:100]!r}", extra={"task": task_id})
+            calls.append(time.perf_counter() - started)
+            await asyncio.sleep(pause)
+    
+    monitor_task = asyncio.create_task(monitor())
+    await asyncio.gather(*(request(i) for i in range(n_tasks)))
+    done.set()
+    await monitor_task
+    return calls, lags
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def report(label: str, calls, lags, elapsed: float):
+    print(f"{label}:")
+    print(f"  per call   p50 {percentile(calls, 0.5) * 1e6:7.1f} us   p99 {percentile(calls, 0.99) * 1e6:7.1f} us   "
+          f"max {max(calls) * 1e6:8.1f} us")
+    print(f"  in logging {sum(calls) * 1000:8.1f} ms of {elapsed * 1000:.1f} ms wall clock ({sum(calls) / elapsed:.0%})")
+    if lags:
+        print(f"  loop lag   p50 {statistics.median(lags) * 1e6:7.1f} us   p99 {percentile(lags, 0.99) * 1e6:7.1f} us   "
+              f"max {max(lags) * 1e6:8.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=200, help="Concurrent request coroutines")
+    parser.add_argument("--lines", type=int, default=50, help="Log lines per coroutine")
+    parser.add_argument("--pause", type=float, default=0.002, help="Seconds awaited between log lines")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as console:
+        tmp = Path(tmp)
+        
+        # Same load with logging disabled: the loop lag the load causes by itself
+        logger = logging.getLogger("bench.off")
+        logger.disabled = True
+        started = time.perf_counter()
+        calls, lags = asyncio.run(run_load(logger, args.tasks, args.lines, args.pause))
+        report("logging disabled", calls, lags, time.perf_counter() - started)
+        
+        logger = sync_logger(tmp / "sync.log", console)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        started = time.perf_counter()
+        calls, lags = asyncio.run(run_load(logger, args.tasks, args.lines, args.pause))
+        report("synchronous handlers", calls, lags, time.perf_counter() - started)
+        
+        logger, listener = queued_logger(tmp / "queued.log", console, args.batch_size)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        started = time.perf_counter()
+        calls, lags = asyncio.run(run_load(logger, args.tasks, args.lines, args.pause))
+        report("queue pipeline", calls, lags, time.perf_counter() - started)
+        drain_started = time.perf_counter()
+        listener.stop()
+        print(f"  background writer drained the rest in {(time.perf_counter() - drain_started) * 1000:.1f} ms")
+        
+        for name in ("sync.log", "queued.log"):
+            print(f"{name}: {sum(1 for _ in open(tmp / name, encoding='utf-8'))} lines")
+
+if __name__ == "__main__":
+    main()
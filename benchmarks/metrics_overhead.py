@@ -0,0 +1,77 @@
+# app/benchmarks/metrics_overhead.py
+"""
+Benchmark: cost of the metrics layer (spans, counters and the request middleware).
+
+Run from the directory containing the `app` package:
+
+    python -m app.benchmarks.metrics_overhead --iterations 200000 --requests 2000
+
+Reports the per-call cost of span() and Counter.inc(), and the added
+latency per request of MetricsMiddleware on a trivial endpoint.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from app.utils.metrics import MetricsMiddleware, MetricsRegistry, span
+
+def per_call(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+    
+    @app.get("/ping/{item}")
+    async def ping(item: str):
+        return {"item": item}
+    
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+async def request_latency(app: FastAPI, n_requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(50):  # warm up
+            await client.get(f"/ping/{i}")
+        started = time.perf_counter()
+        for i in range(n_requests):
+            await client.get(f"/ping/{i}")
+        return (time.perf_counter() - started) / n_requests
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    
+    registry = MetricsRegistry()
+    counter = registry.counter("bench_total", "benchmark counter", ("model", "outcome"))
+    
+    def empty():
+        pass
+    
+    def with_span():
+        with span("benchmark"):
+            pass
+    
+    def with_counter():
+        counter.inc(model="gemini", outcome="ok")
+    
+    baseline = per_call(empty, args.iterations)
+    print(f"span():         {(per_call(with_span, args.iterations) - baseline) * 1e9:8.0f} ns/call")
+    print(f"Counter.inc():  {(per_call(with_counter, args.iterations) - baseline) * 1e9:8.0f} ns/call")
+    
+    plain = asyncio.run(request_latency(build_app(False), args.requests))
+    instrumented = asyncio.run(request_latency(build_app(True), args.requests))
+    print(f"request without middleware: {plain * 1e6:8.1f} us")
+    print(f"request with middleware:    {instrumented * 1e6:8.1f} us "
+          f"({(instrumented - plain) * 1e6:+.1f} us, {instrumented / plain - 1:+.1%})")
+
+if __name__ == "__main__":
+    main()
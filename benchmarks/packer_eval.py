@@ -0,0 +1,64 @@
+# app/benchmarks/packer_eval.py
+"""
+Check: the content packer ranks relevant blocks above boilerplate.
+
+Run from the directory containing the `app` package:
+
+    python -m app.benchmarks.packer_eval
+
+Each case pairs a boilerplate block (cookie notice, footer, newsletter
+prompt) built from words that contain schema keywords as substrings with a
+block the analysis needs. Prints both scores and exits non-zero when any
+boilerplate block outscores its relevant block, or when packing both under
+a budget that fits only one keeps the boilerplate.
+"""
+import argparse
+import os
+import sys
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+
+from app.services.content_packer import Block, ContentPacker
+
+CASES = [
+    (
+        "We use cookies to maintain details of certain sessions. Email us again to explain "
+        "how we retain capital data; renew or change your consent any time.",
+        "Pricing starts at 49 dollars per user each month with an annual discount.",
+    ),
+    (
+        "Subscribe to our newsletter for news and renewals. Unsubscribe from any email.",
+        "The Pro plan is $29/mo billed annually, with a 14-day free trial.",
+    ),
+    (
+        "Copyright 2025. Maintained by our team of explainers. Planned maintenance details.",
+        "Acme is a platform that helps finance teams automate invoice workflows.",
+    ),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+    
+    packer = ContentPacker()
+    failures = 0
+    for boilerplate, relevant in CASES:
+        scores = [
+            ContentPacker.score(Block(url="https://example.com/", page_index=1, position=5, text=text))
+            for text in (boilerplate, relevant)
+        ]
+        budget = max(Block(url="", page_index=0, position=0, text=text).tokens for text in (boilerplate, relevant))
+        packed = packer.pack([("https://example.com/page", f"{boilerplate}\n\n{relevant}")], budget)
+        kept_relevant = relevant in packed.text
+        
+        ok = scores[1] > scores[0] and kept_relevant
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} boilerplate {scores[0]:.3f}  relevant {scores[1]:.3f}  "
+              f"packed {'relevant' if kept_relevant else 'boilerplate'}  | {relevant[:50]}")
+    
+    if failures:
+        print(f"\n{failures} of {len(CASES)} cases ranked boilerplate first")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
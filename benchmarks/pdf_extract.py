@@ -0,0 +1,58 @@
+# app/benchmarks/pdf_extract.py
+"""
+Benchmark: PDF text extraction throughput (pages/sec) by worker count.
+
+Run from the directory containing the `app` package:
+
+    python -m app.benchmarks.pdf_extract --pages 500 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+
+import fitz
+from app.services.pdf_extractor import PDFExtractor
+
+def generate_pdf(path: str, pages: int):
+    """Write a synthetic text-heavy PDF."""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        lines = [f"Page {page_num} line {i}: revenue grew {i * 3}% with ARR of ${i * 1000}." for i in range(60)]
+        page.insert_text((36, 36), "\n".join(lines), fontsize=8)
+    doc.save(path)
+    doc.close()
+
+async def extract_all(extractor: PDFExtractor, path: str) -> int:
+    count = 0
+    async for _ in extractor.iter_pages(path):
+        count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.pdf")
+        generate_pdf(path, args.pages)
+        print(f"cpu count: {os.cpu_count()}, pages: {args.pages}")
+        
+        for workers in args.workers:
+            extractor = PDFExtractor(workers=workers, min_parallel_pages=1)
+            # Warm the pool so process start-up is not counted
+            asyncio.run(extract_all(extractor, path))
+            start = time.perf_counter()
+            pages = asyncio.run(extract_all(extractor, path))
+            elapsed = time.perf_counter() - start
+            extractor.shutdown()
+            print(f"workers={workers:<2} {pages / elapsed:8.1f} pages/sec ({elapsed:.3f}s)")
+
+if __name__ == "__main__":
+    main()
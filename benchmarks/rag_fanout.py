@@ -0,0 +1,98 @@
+# app/benchmarks/rag_fanout.py
+"""
+Benchmark: querying N collections one after another vs. one fan-out query.
+
+Run from the directory containing the `app` package:
+
+    python -m app.benchmarks.rag_fanout --collections 5 --latency 0.2
+
+Each collection's vector search is slowed by --latency to stand in for a
+large index. Sequential calls take about N x latency; the fan-out should
+stay close to a single collection's latency.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+
+import chromadb
+from app.benchmarks.stubs import bow_embedding
+from app.core import clients
+from app.services.rag_service import RAGService
+
+class SlowCollection:
+    """Collection proxy whose vector search takes at least `latency` seconds."""
+    
+    def __init__(self, collection, latency: float):
+        self._collection = collection
+        self._latency = latency
+    
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+    
+    def query(self, **kwargs):
+        time.sleep(self._latency)
+        return self._collection.query(**kwargs)
+
+class SlowClient:
+    def __init__(self, client, latency: float):
+        self._client = client
+        self._latency = latency
+    
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+    
+    def get_collection(self, name):
+        return SlowCollection(self._client.get_collection(name=name), self._latency)
+
+def build_collections(client, n: int):
+    names = []
+    for i in range(n):
+        name = f"benchmark_fanout_{i}"
+        collection = client.get_or_create_collection(name=name)
+        documents = [f"Document {i} section {j}: ARR, burn and runway figures for deal {i}." for j in range(50)]
+        collection.add(
+            ids=[f"{name}_{j}" for j in range(len(documents))],
+            documents=documents,
+            embeddings=[bow_embedding(doc) for doc in documents],
+            metadatas=[{"page": j} for j in range(len(documents))]
+        )
+        names.append(name)
+    return names
+
+async def run(n_collections: int, latency: float):
+    client = chromadb.EphemeralClient()
+    names = build_collections(client, n_collections)
+    clients.chroma.set(SlowClient(client, latency))
+    query = "What is the ARR and runway?"
+    query_embedding = bow_embedding(query)
+    
+    # Warm the BM25 indexes so both runs measure retrieval only
+    await RAGService.query_collections(names, query, query_embedding)
+    
+    start = time.perf_counter()
+    for name in names:
+        await RAGService.query_collection(name, query, query_embedding=query_embedding)
+    sequential = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    chunks = await RAGService.query_collections(names, query, query_embedding)
+    fanout = time.perf_counter() - start
+    
+    print(f"collections:          {n_collections}")
+    print(f"per-collection delay: {latency:.3f}s")
+    print(f"sequential:           {sequential:.3f}s")
+    print(f"fan-out:              {fanout:.3f}s")
+    print(f"merged chunks:        {len(chunks)} from {len({chunk.collection for chunk in chunks})} collections")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collections", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(run(args.collections, args.latency))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# app/benchmarks/rag_query_load.py
+"""
+Load test: N concurrent /api/rag/query calls against a stub model.
+
+Run from the directory containing the `app` package:
+
+    python -m app.benchmarks.rag_query_load --requests 20 --latency 0.5
+
+With a non-blocking client layer the calls overlap, so wall time is about
+ceil(N / MODEL_CONCURRENCY[GENERATIVE_MODEL]) x latency; a blocking client
+would take roughly N x latency.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+
+import chromadb
+import httpx
+from fastapi import FastAPI
+from app.benchmarks.stubs import StubGeminiClient, fake_embedding
+from app.core import clients
+from app.api.routes import rag
+
+COLLECTION_NAME = "benchmark_rag_load"
+
+def build_app(latency: float) -> FastAPI:
+    """Build an app with the RAG router wired to local stubs."""
+    clients.async_gemini_client.client = StubGeminiClient(generate_latency=latency)
+    chroma_client = chromadb.EphemeralClient()
+    clients.chroma.set(chroma_client)
+    
+    collection = chroma_client.get_or_create_collection(name=COLLECTION_NAME)
+    documents = [f"Benchmark passage {i} about revenue, ARR and runway." for i in range(10)]
+    collection.add(
+        documents=documents,
+        embeddings=[fake_embedding(doc) for doc in documents],
+        ids=[f"doc_{i}" for i in range(len(documents))]
+    )
+    
+    app = FastAPI()
+    app.include_router(rag.router)
+    return app
+
+async def run(n_requests: int, latency: float):
+    app = build_app(latency)
+    transport = httpx.ASGITransport(app=app)
+    payload = {"query": "What is the ARR?", "collection_name": COLLECTION_NAME}
+    
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/api/rag/query", json=payload) for _ in range(n_requests)
+        ])
+        elapsed = time.perf_counter() - start
+    
+    failures = [r for r in responses if r.status_code != 200]
+    serial_estimate = n_requests * latency
+    print(f"requests:           {n_requests}")
+    print(f"stub latency:       {latency:.3f}s")
+    print(f"wall time:          {elapsed:.3f}s")
+    print(f"serial estimate:    {serial_estimate:.3f}s")
+    print(f"overlap factor:     {serial_estimate / elapsed:.1f}x")
+    print(f"failures:           {len(failures)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.latency))
+
+if __name__ == "__main__":
+    main()
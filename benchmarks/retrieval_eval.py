@@ -0,0 +1,99 @@
+# app/benchmarks/retrieval_eval.py
+"""
+Offline retrieval eval: recall@k and per-stage latency for dense, BM25,
+RRF fusion alone and the hybrid retriever (RRF + rerank) over a labelled
+pitch-deck set.
+
+Run from the directory containing the `app` package:
+    
+    python -m app.benchmarks.retrieval_eval --k 1 3 5
+    python -m app.benchmarks.retrieval_eval --live   # real Gemini embeddings
+
+Offline runs use a hashed bag-of-words embedding, so "dense" scores there
+only reflect shared vocabulary; use --live to measure the real model.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+
+import chromadb
+from app.benchmarks.stubs import bow_embedding
+from app.services.lexical_index import lexical_indexes
+from app.services.retriever import HybridRetriever, reciprocal_rank_fusion
+
+EVAL_SET = Path(__file__).parent / "data" / "retrieval_eval_set.json"
+
+async def embed_texts(texts, live: bool):
+    if live:
+        from app.services.gemini_service import GeminiService
+        return await GeminiService.embed_batch(texts)
+    return [bow_embedding(text) for text in texts]
+
+def recall_at(ranking, relevant, k: int) -> float:
+    return len(set(ranking[:k]) & set(relevant)) / len(relevant)
+
+async def run(ks, candidates: int, live: bool):
+    eval_set = json.loads(EVAL_SET.read_text())
+    ids = list(eval_set["chunks"])
+    documents = [eval_set["chunks"][chunk_id] for chunk_id in ids]
+    
+    collection = chromadb.EphemeralClient().get_or_create_collection(name=f"retrieval_eval_{int(time.time())}")
+    collection.add(ids=ids, documents=documents, embeddings=await embed_texts(documents, live))
+    index = await lexical_indexes.get(collection)
+    retriever = HybridRetriever(candidates=candidates)
+    depth = max(ks)
+    
+    rankings = {"dense": [], "bm25": [], "rrf only": [], "hybrid+rerank": []}
+    timings = {}
+    
+    def record(stage, seconds):
+        timings.setdefault(stage, []).append(seconds * 1000)
+    
+    for item in eval_set["queries"]:
+        started = time.perf_counter()
+        query_embedding = (await embed_texts([item["query"]], live))[0]
+        record("embed", time.perf_counter() - started)
+        
+        dense = collection.query(query_embeddings=[query_embedding], n_results=depth)
+        rankings["dense"].append(dense["ids"][0])
+        rankings["bm25"].append([doc_id for doc_id, _ in index.search(item["query"], k=depth)])
+        
+        # Fusion without the rerank, for comparison (the retriever always reranks)
+        found = await retriever.gather_candidates(collection, item["query"], query_embedding)
+        fused = reciprocal_rank_fusion([found.dense_keys, found.lexical_keys], k=retriever.rrf_k)
+        rankings["rrf only"].append([found.chunks[key].id for key in sorted(fused, key=fused.get, reverse=True)[:depth]])
+        
+        result = await retriever.retrieve(collection, item["query"], query_embedding, top_k=depth)
+        rankings["hybrid+rerank"].append([chunk.id for chunk in result.chunks])
+        for stage, seconds in result.timings.items():
+            record(stage.removesuffix("_seconds"), seconds)
+    
+    relevant = [item["relevant"] for item in eval_set["queries"]]
+    print(f"queries: {len(relevant)}   chunks: {len(ids)}   embeddings: {'gemini' if live else 'bag-of-words stub'}")
+    print()
+    print(f"{'retriever':<16}" + "".join(f"{f'recall@{k}':>12}" for k in ks))
+    for mode, ranked in rankings.items():
+        scores = [statistics.mean(recall_at(r, rel, k) for r, rel in zip(ranked, relevant)) for k in ks]
+        print(f"{mode:<16}" + "".join(f"{score:>12.3f}" for score in scores))
+    
+    print()
+    print(f"{'stage':<16}{'p50 ms':>12}{'max ms':>12}")
+    for stage, values in timings.items():
+        print(f"{stage:<16}{statistics.median(values):>12.2f}{max(values):>12.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--live", action="store_true", help="embed with the configured Gemini model")
+    args = parser.parse_args()
+    asyncio.run(run(sorted(args.k), args.candidates, args.live))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# app/benchmarks/stubs.py
+"""Deterministic local stand-ins for remote backends used by the benchmarks."""
+import asyncio
+import hashlib
+import json
+import math
+import re
+import time
+from types import SimpleNamespace
+from typing import List, get_args, get_origin
+from pydantic import BaseModel
+
+EMBEDDING_DIM = 64
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """Deterministic pseudo-embedding derived from the text hash."""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [(digest[i % len(digest)] - 128) / 128.0 for i in range(dim)]
+
+def bow_embedding(text: str, dim: int = 256) -> List[float]:
+    """
+    Hashed bag-of-words embedding: a crude stand-in for a real embedding
+    model that at least ranks texts by shared vocabulary.
+    """
+    vector = [0.0] * dim
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % dim] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+def stub_instance(schema) -> dict:
+    """A filled-in, schema-valid instance of a response model (every list gets three items)."""
+    values = {}
+    for name, field in schema.model_fields.items():
+        annotation = field.annotation
+        if get_origin(annotation) in (list, List):
+            (item,) = get_args(annotation)
+            if isinstance(item, type) and issubclass(item, BaseModel):
+                values[name] = [stub_instance(item) for _ in range(3)]
+            else:
+                values[name] = [f"Stub {name.replace('_', ' ')} {i + 1}" for i in range(3)]
+        elif isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            values[name] = stub_instance(annotation)
+        elif name == "timestamp":
+            values[name] = "0:30"
+        else:
+            values[name] = f"Stub {name.replace('_', ' ')}."
+    return schema.model_validate(values).model_dump()
+
+def stub_usage(contents, text: str) -> SimpleNamespace:
+    return SimpleNamespace(prompt_token_count=len(str(contents)) // 4, candidates_token_count=len(text) // 4)
+
+class StubModels:
+    """Mimics `client.aio.models` with a fixed per-call latency."""
+    
+    def __init__(self, generate_latency: float = 0.5, embed_latency: float = 0.05):
+        self.generate_latency = generate_latency
+        self.embed_latency = embed_latency
+        self.generate_calls = 0
+        self.embed_calls = 0
+    
+    @staticmethod
+    def response_text(model: str, contents, config) -> str:
+        """JSON matching the requested response schema, or a plain answer."""
+        schema = (config or {}).get("response_schema")
+        if schema is not None:
+            return json.dumps(stub_instance(schema))
+        return f"Stub answer from {model} for a {len(str(contents))}-char prompt."
+    
+    async def generate_content(self, model: str, contents, config=None):
+        self.generate_calls += 1
+        await asyncio.sleep(self.generate_latency)
+        text = self.response_text(model, contents, config)
+        return SimpleNamespace(text=text, usage_metadata=stub_usage(contents, text))
+    
+    async def generate_content_stream(self, model: str, contents, config=None):
+        self.generate_calls += 1
+        return self._stream(self.response_text(model, contents, config), contents)
+    
+    async def _stream(self, text: str, contents, chunks: int = 10):
+        step = max(1, math.ceil(len(text) / chunks))
+        for i in range(0, len(text), step):
+            await asyncio.sleep(self.generate_latency / chunks)
+            last = i + step >= len(text)
+            yield SimpleNamespace(text=text[i:i + step], usage_metadata=stub_usage(contents, text) if last else None)
+    
+    async def embed_content(self, model: str, contents, config=None):
+        self.embed_calls += 1
+        await asyncio.sleep(self.embed_latency)
+        return SimpleNamespace(
+            embeddings=[SimpleNamespace(values=fake_embedding(text)) for text in contents]
+        )
+
+class StubGeminiClient:
+    """Drop-in replacement for `genai.Client` exposing only the async surface."""
+    
+    def __init__(self, generate_latency: float = 0.5, embed_latency: float = 0.05):
+        self.aio = SimpleNamespace(models=StubModels(generate_latency, embed_latency))
+
+class StubCrawler:
+    """Replaces crawl4ai's AsyncWebCrawler: serves a small synthetic site for any URL."""
+    
+    latency = 0.1
+    
+    def __init__(self, *args, **kwargs):
+        pass
+    
+    async def start(self):
+        pass
+    
+    async def close(self):
+        pass
+    
+    async def arun(self, url: str, **kwargs):
+        await asyncio.sleep(self.latency)
+        page = url.rstrip("/").rsplit("/", 1)[-1]
+        markdown = (
+            f"# {page.title()}\n\n{url} builds analytics software for finance teams. "
+            "Plans start at $49/month with a 14-day free trial; enterprise pricing on request.\n\n"
+            "## Features\n\nDashboards, forecasting, integrations with every major ERP and an open API.\n\n"
+            "Founded in 2019, raised a Series A in 2023 and trusted by 400 customers."
+        )
+        return SimpleNamespace(
+            success=True,
+            status_code=200,
+            markdown=markdown,
+            links={"internal": [{"href": "/pricing"}, {"href": "/features"}, {"href": "/about"}]},
+            response_headers={"ETag": f'"{hashlib.sha1(markdown.encode()).hexdigest()}"'}
+        )
+
+class StubTranscriptApi:
+    """
+    Replaces YouTubeTranscriptApi with a deterministic transcript per video id.
+    Ids of the form "m<minutes>x..." ask for a transcript that long.
+    """
+    
+    latency = 0.05
+    minutes = 10
+    
+    @classmethod
+    def get_transcript(cls, video_id: str):
+        time.sleep(cls.latency)  # called from a worker thread, like the real client
+        match = re.match(r"m(\d+)x", video_id)
+        minutes = int(match.group(1)) if match else cls.minutes
+        return [
+            {
+                "start": i * 5.0,
+                "duration": 5.0,
+                "text": f"{video_id} segment {i}: we grew revenue {i % 40}% this quarter and are raising a seed round."
+            }
+            for i in range(minutes * 12)
+        ]
+
+class StubWhisperModel:
+    """Replaces a faster-whisper WhisperModel: sleeps `rtf` x audio duration and returns one segment per 5 seconds."""
+    
+    def __init__(self, rtf: float = 0.05, sample_rate: int = 16000):
+        self.rtf = rtf
+        self.sample_rate = sample_rate
+    
+    def transcribe(self, audio, beam_size: int = 5, vad_filter: bool = False):
+        duration = len(audio) / self.sample_rate
+        time.sleep(duration * self.rtf)
+        segments = [
+            SimpleNamespace(start=start, end=min(start + 5.0, duration), text=f"Stub speech at {start:.0f} seconds.")
+            for start in range(0, max(int(duration), 1), 5)
+        ]
+        return iter(segments), SimpleNamespace(duration=duration)
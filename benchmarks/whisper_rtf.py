@@ -0,0 +1,51 @@
+# app/benchmarks/whisper_rtf.py
+"""
+Benchmark: Whisper real-time factor (processing time / audio duration) by worker count.
+
+Run from the directory containing the `app` package:
+
+    python -m app.benchmarks.whisper_rtf --audio sample_pitch.mp3 --workers 1 2 4
+
+Lower is better; an RTF of 0.1 means ten minutes of audio take one minute.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub-key")
+
+from faster_whisper import decode_audio
+from app.config import settings
+from app.services.transcription_engine import SAMPLE_RATE, TranscriptionEngine
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", required=True, help="Sample clip (any format FFmpeg can decode)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--segment-seconds", type=float, default=settings.WHISPER_SEGMENT_SECONDS)
+    parser.add_argument("--model", default=settings.WHISPER_MODEL)
+    args = parser.parse_args()
+    
+    audio = decode_audio(args.audio, sampling_rate=SAMPLE_RATE)
+    duration = len(audio) / SAMPLE_RATE
+    print(f"clip: {args.audio} ({duration:.1f}s), cpu count: {os.cpu_count()}")
+    
+    for workers in args.workers:
+        engine = TranscriptionEngine(
+            args.model,
+            device=settings.WHISPER_DEVICE,
+            compute_type=settings.WHISPER_COMPUTE_TYPE,
+            workers=workers,
+            segment_seconds=args.segment_seconds
+        )
+        # Load models outside the timed region
+        engine._ensure_pool()
+        start = time.perf_counter()
+        segments = asyncio.run(engine.transcribe_array(audio))
+        elapsed = time.perf_counter() - start
+        print(f"workers={workers:<2} threads/worker={engine.cpu_threads:<2} "
+              f"RTF={elapsed / duration:.3f} ({elapsed:.1f}s, {len(segments)} segments)")
+
+if __name__ == "__main__":
+    main()
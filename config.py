@@ -19,36 +19,122 @@ class Settings:
     EMBEDDING_MODEL: str = 'models/text-embedding-004'
     GENERATIVE_MODEL: str = 'gemini-2.5-flash'
     
+    # Model Concurrency (max in-flight calls per model)
+    MODEL_CONCURRENCY: dict = {
+        GENERATIVE_MODEL: 8,
+        EMBEDDING_MODEL: 16,
+    }
+    DEFAULT_MODEL_CONCURRENCY: int = 4
+    STRUCTURED_OUTPUT_MAX_ATTEMPTS: int = 3  # generations per analysis when the JSON can't be parsed
+    
     # Storage Paths
     BASE_DIR: Path = Path(__file__).resolve().parent.parent
     UPLOAD_DIR: Path = BASE_DIR / "uploads"
     CHROMA_DB_PATH: Path = BASE_DIR / "chroma_db"
+    EMBEDDING_CACHE_PATH: Path = BASE_DIR / "embedding_cache.sqlite3"
+    RESULT_CACHE_PATH: Path = BASE_DIR / "result_cache.sqlite3"
     LOG_FILE: Path = BASE_DIR / "app.log"
+    JOB_STORE_DIR: Path = BASE_DIR / "jobs"
     
     # CORS Settings
     CORS_ORIGINS: list = ["*"]  # In production, specify exact origins
     
     # File Upload Settings
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024  # 50MB
+    MAX_VIDEO_UPLOAD_SIZE: int = 1024 * 1024 * 1024  # 1GB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1MB
     ALLOWED_EXTENSIONS: set = {'.pdf', '.mp4', '.mov', '.avi'}
     
     # Processing Settings
     MAX_PAGES_PDF: int = 10
-    MAX_PAGES_RAG: int = 5
+    MAX_PAGES_RAG: int = 500
+    PDF_EXTRACT_WORKERS: int = None  # None = one per CPU
+    PDF_PARALLEL_MIN_PAGES: int = 32
     CHUNK_SIZE: int = 1500
     CHUNK_OVERLAP: int = 300
     
+    # RAG Retrieval Settings
+    RAG_TOP_K: int = 3  # chunks passed to generation
+    RAG_CANDIDATES: int = 20  # hits taken from each of the dense and BM25 retrievers
+    RAG_RRF_K: int = 60
+    RAG_LEXICAL_MAX_INDEXES: int = 32  # BM25 indexes kept in memory (least recently used evicted)
+    RAG_MULTI_TOP_K: int = 6  # chunks passed to generation when querying several collections
+    RAG_MAX_COLLECTIONS: int = 20
+    RAG_CONTEXT_TOKENS: int = 4000  # budget for merged context passages per answer
+    
+    # Embedding Batch Settings
+    EMBED_BATCH_MAX_ITEMS: int = 100
+    EMBED_BATCH_MAX_CHARS: int = 100_000
+    EMBED_CONCURRENCY: int = 4
+    EMBED_MAX_RETRIES: int = 5
+    EMBED_RETRY_BASE_DELAY: float = 1.0
+    
+    # Embedding Cache Settings
+    EMBEDDING_CACHE_MEMORY_ITEMS: int = 2048
+    EMBEDDING_CACHE_MAX_ITEMS: int = 200_000
+    
+    # Transcript / Analysis Cache Settings
+    TRANSCRIPT_CACHE_MAX_BYTES: int = 200 * 1024 * 1024  # 200MB
+    ANALYSIS_CACHE_MAX_BYTES: int = 50 * 1024 * 1024  # 50MB
+    
+    # Long Transcript Analysis Settings
+    TRANSCRIPT_SINGLE_PASS_CHARS: int = 15000  # longer transcripts are analyzed map-reduce
+    TRANSCRIPT_WINDOW_SECONDS: int = 300
+    TRANSCRIPT_WINDOW_MAX_CHARS: int = 12000
+    
+    # Answer Cache Settings
+    ANSWER_CACHE_MAX_ENTRIES: int = 256  # per collection scope
+    ANSWER_CACHE_MAX_TOTAL_ENTRIES: int = 4096  # across all scopes
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_SIMILARITY: float = 0.95  # cosine threshold for near-duplicate queries
+    
+    # Competitor Crawl Settings
+    CRAWLER_POOL_SIZE: int = 4
+    CRAWLER_PER_DOMAIN_LIMIT: int = 2
+    COMPETITOR_BATCH_MAX: int = 30
+    COMPETITOR_CRAWL_MAX_PAGES: int = 4  # Homepage plus up to 3 subpages
+    COMPETITOR_CRAWL_PATHS: list = ["/pricing", "/features", "/about"]
+    COMPETITOR_CONTEXT_TOKENS: int = 6000
+    SCRAPE_CACHE_TTL_SECONDS: int = 24 * 3600  # Serve cached pages without revalidating
+    SCRAPE_CACHE_MAX_BYTES: int = 100 * 1024 * 1024  # 100MB
+    SCRAPE_REVALIDATE_TIMEOUT: float = 10.0
+    
+    # Logging Settings
+    LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO').upper()
+    # Per-logger overrides, e.g. LOG_LEVELS="ai_analyst=DEBUG,ai_analyst.rag=WARNING"
+    LOG_LEVELS: dict = {
+        name.strip(): level.strip().upper()
+        for name, _, level in (item.partition('=') for item in os.getenv('LOG_LEVELS', '').split(','))
+        if name.strip() and level.strip()
+    }
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024  # 10MB per app.log file before rotating
+    LOG_BACKUP_COUNT: int = 5
+    LOG_BATCH_SIZE: int = 256  # records written per flush by the background writer
+    LOG_DEBUG_SAMPLE_RATE: float = 0.1  # share of DEBUG records kept, per call site
+    
+    # Startup Settings
+    # Clients built in the background at startup ("gemini", "chroma", "whisper");
+    # anything not listed is built on first use. /health reports ready once these are loaded.
+    WARMUP_RESOURCES: list = [
+        name.strip() for name in os.getenv('WARMUP_RESOURCES', 'gemini,chroma').split(',') if name.strip()
+    ]
+    
+    # Background Job Settings
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_SIZE: int = 100
+    
     # Whisper Model Settings
     WHISPER_MODEL: str = "base"
     WHISPER_DEVICE: str = "cpu"
     WHISPER_COMPUTE_TYPE: str = "int8"
+    WHISPER_WORKERS: int = 2  # parallel model instances
+    WHISPER_CPU_THREADS: int = 0  # per instance; 0 = split cores evenly
+    WHISPER_SEGMENT_SECONDS: float = 60.0
+    WHISPER_BEAM_SIZE: int = 5
     
     def __init__(self):
-        """Create necessary directories on init."""
+        """Create necessary directories on init (the API key is checked when the Gemini client is built)."""
         self.UPLOAD_DIR.mkdir(exist_ok=True)
         self.CHROMA_DB_PATH.mkdir(exist_ok=True)
-        
-        if not self.GEMINI_API_KEY:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
 
 settings = Settings()
@@ -1,30 +1,214 @@
 # app/core/clients.py
-from google import genai
-import chromadb
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 from app.config import settings
 from app.utils.logger import logger
+from app.utils.metrics import MODEL_CALLS, record_usage, span
 
-# Initialize Gemini client
-logger.info("🚀 Initializing Gemini client...")
-gemini_client = genai.Client(api_key=settings.GEMINI_API_KEY)
-logger.info("✅ Gemini client initialized")
-
-# Initialize ChromaDB
-logger.info(f"💾 Setting up ChromaDB at: {settings.CHROMA_DB_PATH}")
-chroma_client = chromadb.PersistentClient(path=str(settings.CHROMA_DB_PATH))
-logger.info("✅ ChromaDB client initialized")
-
-# Initialize Whisper model (optional)
-whisper_model = None
-try:
-    from faster_whisper import WhisperModel
-    whisper_model = WhisperModel(
-        settings.WHISPER_MODEL,
-        device=settings.WHISPER_DEVICE,
-        compute_type=settings.WHISPER_COMPUTE_TYPE
-    )
-    logger.info("✅ Whisper model initialized")
-except ImportError:
-    logger.warning("⚠️ Whisper not installed. Video upload disabled.")
-except Exception as e:
-    logger.warning(f"⚠️ Whisper initialization failed: {e}")
+class LazyResource:
+    """
+    A heavy client built on first use.
+    
+    The factory runs at most once even when several threads ask for the
+    resource at the same time; a failed build is retried on the next call.
+    """
+    
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self.factory = factory
+        self.state = "idle"  # idle -> loading -> ready | failed
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._value = None
+        self._lock = threading.Lock()
+    
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+    
+    def get(self):
+        if self.state == "ready":
+            return self._value
+        with self._lock:
+            if self.state != "ready":
+                self.state = "loading"
+                started = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    self.state = "failed"
+                    self.error = str(e)
+                    raise
+                self.load_seconds = time.perf_counter() - started
+                self.error = None
+                self.state = "ready"
+            return self._value
+    
+    def set(self, value):
+        """Use an already-built value (stubs in benchmarks, clients built elsewhere)."""
+        with self._lock:
+            self._value = value
+            self.error = None
+            self.state = "ready"
+    
+    def status(self) -> dict:
+        status = {"state": self.state}
+        if self.load_seconds is not None:
+            status["load_seconds"] = round(self.load_seconds, 3)
+        if self.error:
+            status["error"] = self.error
+        return status
+
+class ResourceRegistry:
+    """Named lazy resources, with an optional warm-up at startup and readiness reporting."""
+    
+    def __init__(self):
+        self._resources: Dict[str, LazyResource] = {}
+    
+    def register(self, name: str, factory: Callable[[], Any]) -> LazyResource:
+        return self.add(LazyResource(name, factory))
+    
+    def add(self, resource: LazyResource) -> LazyResource:
+        self._resources[resource.name] = resource
+        return resource
+    
+    def get(self, name: str):
+        """Build (first call) and return a resource."""
+        return self._resources[name].get()
+    
+    def override(self, name: str, value):
+        self._resources[name].set(value)
+    
+    async def warm_up(self, names: List[str]):
+        """Build the named resources concurrently off the event loop; failures are logged, not raised."""
+        async def load(name: str):
+            resource = self._resources.get(name)
+            if resource is None:
+                logger.warning(f"⚠️ Unknown resource in warm-up list: {name}")
+                return
+            try:
+                await asyncio.to_thread(resource.get)
+                logger.info(f"🔥 Warmed up {name} in {resource.load_seconds or 0:.2f}s")
+            except Exception as e:
+                logger.error(f"❌ Warm-up of {name} failed: {e}")
+        
+        await asyncio.gather(*[load(name) for name in names])
+    
+    def status(self) -> Dict[str, dict]:
+        return {name: resource.status() for name, resource in self._resources.items()}
+    
+    def ready(self, names: List[str]) -> bool:
+        """Whether every named resource has been built."""
+        return all(name in self._resources and self._resources[name].ready for name in names)
+
+resources = ResourceRegistry()
+
+class AsyncGeminiClient:
+    """Non-blocking facade over the Gemini SDK with per-model concurrency limits."""
+    
+    def __init__(self, client: LazyResource, limits: Dict[str, int] = None, default_limit: int = 4):
+        self._client = client
+        self.limits = limits or {}
+        self.default_limit = default_limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+    
+    @property
+    def client(self):
+        """The SDK client, built on first call."""
+        return self._client.get()
+    
+    @client.setter
+    def client(self, value):
+        self._client.set(value)
+    
+    def _semaphore(self, model: str) -> asyncio.Semaphore:
+        """Get (or lazily create) the semaphore bounding calls to a model."""
+        semaphore = self._semaphores.get(model)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(model, self.default_limit))
+            self._semaphores[model] = semaphore
+        return semaphore
+    
+    async def generate_content(self, model: str, contents, config: Optional[dict] = None):
+        """Generate content without blocking the event loop."""
+        async with self._semaphore(model):
+            with span("generate"):
+                try:
+                    response = await self.client.aio.models.generate_content(
+                        model=model,
+                        contents=contents,
+                        config=config or {}
+                    )
+                except Exception:
+                    MODEL_CALLS.inc(model=model, operation="generate", outcome="error")
+                    raise
+        MODEL_CALLS.inc(model=model, operation="generate", outcome="ok")
+        record_usage(model, getattr(response, "usage_metadata", None))
+        return response
+    
+    async def generate_content_stream(self, model: str, contents, config: Optional[dict] = None) -> AsyncIterator:
+        """Stream generated content chunks as they arrive; the model slot is held until the stream ends."""
+        usage = None
+        async with self._semaphore(model):
+            with span("generate_stream"):
+                try:
+                    stream = await self.client.aio.models.generate_content_stream(
+                        model=model,
+                        contents=contents,
+                        config=config or {}
+                    )
+                    async for chunk in stream:
+                        # Usage metadata is cumulative; the last chunk carrying it has the totals
+                        usage = getattr(chunk, "usage_metadata", None) or usage
+                        yield chunk
+                except Exception:
+                    MODEL_CALLS.inc(model=model, operation="stream", outcome="error")
+                    raise
+        MODEL_CALLS.inc(model=model, operation="stream", outcome="ok")
+        record_usage(model, usage)
+    
+    async def embed_content(self, model: str, contents, config: Optional[dict] = None):
+        """Embed content without blocking the event loop."""
+        async with self._semaphore(model):
+            with span("embed"):
+                try:
+                    response = await self.client.aio.models.embed_content(
+                        model=model,
+                        contents=contents,
+                        config=config or {}
+                    )
+                except Exception:
+                    MODEL_CALLS.inc(model=model, operation="embed", outcome="error")
+                    raise
+        MODEL_CALLS.inc(model=model, operation="embed", outcome="ok")
+        return response
+
+def build_gemini_client():
+    if not settings.GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY not found in environment variables")
+    from google import genai
+    
+    logger.info("🚀 Initializing Gemini client...")
+    client = genai.Client(api_key=settings.GEMINI_API_KEY)
+    logger.info("✅ Gemini client initialized")
+    return client
+
+def build_chroma_client():
+    import chromadb
+    
+    logger.info(f"💾 Setting up ChromaDB at: {settings.CHROMA_DB_PATH}")
+    client = chromadb.PersistentClient(path=str(settings.CHROMA_DB_PATH))
+    logger.info("✅ ChromaDB client initialized")
+    return client
+
+# Heavy clients are built on first use (or by the startup warm-up, see WARMUP_RESOURCES)
+gemini = resources.register("gemini", build_gemini_client)
+chroma = resources.register("chroma", build_chroma_client)
+
+async_gemini_client = AsyncGeminiClient(
+    gemini,
+    limits=settings.MODEL_CONCURRENCY,
+    default_limit=settings.DEFAULT_MODEL_CONCURRENCY
+)
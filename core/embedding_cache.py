@@ -0,0 +1,160 @@
+# app/core/embedding_cache.py
+import sqlite3
+import hashlib
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+from app.config import settings
+from app.utils.logger import logger
+from app.utils.metrics import record_cache
+
+class EmbeddingCache:
+    """Content-addressed embedding cache: in-memory LRU in front of SQLite."""
+    
+    def __init__(self, db_path: Path, memory_items: int = 2048, max_items: int = 200_000):
+        self.db_path = Path(db_path)
+        self.memory_items = memory_items
+        self.max_items = max_items
+        self._memory: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_count = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Content address for a piece of text."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the SQLite store on first use."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+            self._disk_count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            logger.info(f"💾 Embedding cache opened at {self.db_path} ({self._disk_count} entries)")
+        return self._conn
+    
+    def _remember(self, key: Tuple[str, str], vector: List[float]):
+        """Insert into the in-memory LRU tier, evicting the oldest entry."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+    
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up embeddings; returns None for every text not cached."""
+        keys = [(model, self.text_hash(text)) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        
+        with self._lock:
+            pending = {}
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+                    self.memory_hits += 1
+                else:
+                    pending.setdefault(key[1], []).append(i)
+            
+            if pending:
+                conn = self._connect()
+                hashes = list(pending)
+                found = []
+                for start in range(0, len(hashes), 500):
+                    batch = hashes[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    found.extend(conn.execute(
+                        f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                        [model, *batch]
+                    ).fetchall())
+                
+                for text_hash, blob in found:
+                    vector = array("f", blob).tolist()
+                    self._remember((model, text_hash), vector)
+                    for i in pending.pop(text_hash):
+                        results[i] = vector
+                        self.disk_hits += 1
+                
+                if found:
+                    now = time.time()
+                    conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                        [(now, model, text_hash) for text_hash, _ in found]
+                    )
+                    conn.commit()
+                
+                self.misses += sum(len(indices) for indices in pending.values())
+        
+        missed = results.count(None)
+        record_cache("embeddings", hit=True, count=len(results) - missed)
+        record_cache("embeddings", hit=False, count=missed)
+        return results
+    
+    def put_many(self, model: str, texts: List[str], embeddings: List[List[float]]):
+        """Store embeddings for texts, evicting least recently used rows past the size bound."""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, embeddings):
+                key = (model, self.text_hash(text))
+                self._remember(key, list(vector))
+                rows.append((model, key[1], array("f", vector).tobytes(), now))
+            
+            conn = self._connect()
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._disk_count += conn.total_changes - before
+            
+            excess = self._disk_count - self.max_items
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                self._disk_count -= excess
+                self.evictions += excess
+            conn.commit()
+    
+    def stats(self) -> dict:
+        """Hit/miss counters and tier sizes."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory_items": len(self._memory),
+            "disk_items": self._disk_count,
+            "evictions": self.evictions,
+        }
+
+embedding_cache = EmbeddingCache(
+    settings.EMBEDDING_CACHE_PATH,
+    memory_items=settings.EMBEDDING_CACHE_MEMORY_ITEMS,
+    max_items=settings.EMBEDDING_CACHE_MAX_ITEMS
+)
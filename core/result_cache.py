@@ -0,0 +1,169 @@
+# app/core/result_cache.py
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.utils.logger import logger
+from app.utils.metrics import record_cache
+
+class ResultCache:
+    """Persistent JSON key/value cache, LRU-evicted to stay under a byte budget."""
+    
+    def __init__(self, db_path: Path, namespace: str, max_bytes: int):
+        self.db_path = Path(db_path)
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the SQLite store on first use."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_entries_lru ON cache_entries (namespace, last_used)"
+            )
+        return self._conn
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for a key, or None."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                record_cache(self.namespace, hit=False)
+                return None
+            conn.execute(
+                "UPDATE cache_entries SET last_used = ? WHERE namespace = ? AND key = ?",
+                (time.time(), self.namespace, key)
+            )
+            conn.commit()
+            self.hits += 1
+            record_cache(self.namespace, hit=True)
+            return json.loads(row[0])
+    
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value, evicting least recently used entries over budget."""
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, payload, len(payload), now, now)
+            )
+            self._evict(conn)
+            conn.commit()
+    
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (self.namespace,)
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        rows = conn.execute(
+            "SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY last_used",
+            (self.namespace,)
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((self.namespace, key))
+            total -= size
+        conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", evicted)
+        self.evictions += len(evicted)
+        logger.info(f"🧹 Evicted {len(evicted)} entries from {self.namespace} cache")
+    
+    def delete(self, key: str) -> bool:
+        """Remove one entry; returns whether it existed."""
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+    
+    def clear(self) -> int:
+        """Remove every entry; returns how many were removed."""
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            conn.commit()
+            return cursor.rowcount
+    
+    def entries(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recently used entries (metadata only)."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT key, size, created_at, last_used FROM cache_entries "
+                "WHERE namespace = ? ORDER BY last_used DESC LIMIT ?",
+                (self.namespace, limit)
+            ).fetchall()
+        return [
+            {"key": key, "size": size, "created_at": created_at, "last_used": last_used}
+            for key, size, created_at, last_used in rows
+        ]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, byte usage and hit/miss counters."""
+        with self._lock:
+            count, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+                (self.namespace,)
+            ).fetchone()
+        return {
+            "entries": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+transcript_cache = ResultCache(
+    settings.RESULT_CACHE_PATH, "transcripts", max_bytes=settings.TRANSCRIPT_CACHE_MAX_BYTES
+)
+analysis_cache = ResultCache(
+    settings.RESULT_CACHE_PATH, "analyses", max_bytes=settings.ANALYSIS_CACHE_MAX_BYTES
+)
+scrape_cache = ResultCache(
+    settings.RESULT_CACHE_PATH, "scrapes", max_bytes=settings.SCRAPE_CACHE_MAX_BYTES
+)
+
+# Caches exposed through the admin API
+result_caches: Dict[str, ResultCache] = {
+    "transcripts": transcript_cache,
+    "analyses": analysis_cache,
+    "scrapes": scrape_cache,
+}
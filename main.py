@@ -1,10 +1,18 @@
 # app/main.py
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from datetime import datetime
 from app.config import settings
+from app.core.clients import resources
 from app.utils.logger import logger
-from app.api.routes import video_pitch, rag, competitor
+from app.utils.uploads import UploadSizeLimitMiddleware
+from app.utils.metrics import MetricsMiddleware, metrics
+from app.api.routes import video_pitch, rag, competitor, admin
+from app.services.pdf_extractor import pdf_extractor
+from app.services.job_service import job_service
+from app.services.crawler_pool import crawler_pool
 # from app.api.routes import ai_analyzer  # Add when implemented
 
 # Initialize FastAPI app
@@ -23,10 +31,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized uploads before the multipart body is parsed; only video routes take 1GB
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/api/video-pitch/upload": settings.MAX_VIDEO_UPLOAD_SIZE,
+        "/api/video-pitch/jobs": settings.MAX_VIDEO_UPLOAD_SIZE,
+        "/api/rag/upload": settings.MAX_UPLOAD_SIZE,
+    },
+    default_max_bytes=settings.MAX_UPLOAD_SIZE
+)
+
+# Request latency histogram (outermost, so it sees every response)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(video_pitch.router)
 app.include_router(rag.router)
 app.include_router(competitor.router)
+app.include_router(admin.router)
 # app.include_router(ai_analyzer.router)  # Add when implemented
 
 @app.get("/")
@@ -40,13 +63,20 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Health check endpoint; `ready` turns true once the warm-up resources are loaded."""
     return {
         "status": "healthy",
+        "ready": resources.ready(settings.WARMUP_RESOURCES),
+        "resources": resources.status(),
         "timestamp": datetime.now().isoformat(),
         "version": settings.API_VERSION
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request latency, stage timings, model calls/tokens and cache lookups in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.on_event("startup")
 async def startup_event():
     """Run on application startup."""
@@ -56,6 +86,13 @@ async def startup_event():
     logger.info(f"📁 Upload directory: {settings.UPLOAD_DIR}")
     logger.info(f"💾 ChromaDB path: {settings.CHROMA_DB_PATH}")
     logger.info("="*70)
+    # Build heavy clients in the background so the server starts accepting requests right away
+    app.state.warm_up = asyncio.create_task(resources.warm_up(settings.WARMUP_RESOURCES))
+    await job_service.start()
+    try:
+        await crawler_pool.start()
+    except Exception as e:
+        logger.warning(f"⚠️ Crawler pool not started, will retry on first request: {e}")
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -63,6 +100,9 @@ async def shutdown_event():
     logger.info("="*70)
     logger.info("👋 AI ANALYST PLATFORM - SHUTTING DOWN")
     logger.info("="*70)
+    await job_service.stop()
+    await crawler_pool.close()
+    pdf_extractor.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
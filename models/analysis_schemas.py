@@ -0,0 +1,43 @@
+# app/models/analysis_schemas.py
+from typing import List
+from pydantic import BaseModel, ConfigDict, Field
+
+# Response schemas passed to Gemini as structured-output config. The core
+# content fields are required and non-empty, so an empty, truncated or
+# off-schema reply fails validation (and is retried) instead of passing as
+# a blank analysis; the remaining fields default when the model omits them.
+
+class AnalysisModel(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+class NotableSlide(AnalysisModel):
+    timestamp: str = Field(default="", description="Position in the video, e.g. 2:30")
+    description: str = Field(default="", description="What the slide or moment covers")
+
+class PitchAnalysis(AnalysisModel):
+    video_title: str = Field(default="", description="Pitch or company name, extracted or inferred")
+    duration: str = Field(default="", description="Estimated duration")
+    channel: str = Field(default="", description="Speaker or company name if mentioned")
+    executive_summary: str = Field(min_length=1, description="2-3 sentence overview of the pitch")
+    key_insights: List[str] = Field(min_length=1, description="Five major insights")
+    main_points: List[str] = Field(default_factory=list, description="Four main points from the pitch")
+    notable_slides: List[NotableSlide] = Field(default_factory=list)
+    action_items: List[str] = Field(default_factory=list, description="Recommendations or action items")
+
+class CompetitorAnalysis(AnalysisModel):
+    company_overview: str = Field(min_length=1, description="Brief 2-3 sentence description")
+    business_model: str = Field(default="", description="How they make money")
+    target_audience: str = Field(default="", description="Who their customers are")
+    key_features: List[str] = Field(default_factory=list)
+    pricing_strategy: str = Field(default="", description="Pricing model and tiers")
+    technology_stack: str = Field(default="", description="Technologies they use, if mentioned")
+    competitive_advantages: List[str] = Field(default_factory=list)
+    weaknesses: List[str] = Field(default_factory=list)
+    recent_news: str = Field(default="", description="Recent updates or announcements")
+
+class WindowSummary(AnalysisModel):
+    """Map-step summary of one time window of a long transcript."""
+    summary: str = Field(min_length=1, description="What this part of the pitch covers, 2-4 sentences")
+    key_points: List[str] = Field(default_factory=list, description="Claims, arguments and facts made in this window")
+    metrics: List[str] = Field(default_factory=list, description="Numbers mentioned: traction, revenue, market size, the ask")
+    notable_moments: List[NotableSlide] = Field(default_factory=list, description="Slide changes or key moments, with timestamps from the transcript")
@@ -1,4 +1,5 @@
 # app/models/request_models.py
+from typing import List, Optional
 from pydantic import BaseModel, Field, validator
 
 class VideoPitchRequest(BaseModel):
@@ -14,6 +15,11 @@ class CompetitorRequest(BaseModel):
     company_name: str = Field(..., min_length=1, description="Target company name")
     company_url: str = Field(..., description="Target company website URL")
 
+class CompetitorBatchRequest(BaseModel):
+    companies: List[CompetitorRequest] = Field(..., min_length=1, description="Companies to analyze")
+
 class RAGQueryRequest(BaseModel):
     query: str = Field(..., min_length=1, description="User question")
     collection_name: str = Field(default="user_documents", description="Collection to query")
+    collection_names: Optional[List[str]] = Field(default=None, description="Query several collections at once (overrides collection_name)")
+    collection_prefix: Optional[str] = Field(default=None, description="Query every collection whose name starts with this prefix")
@@ -0,0 +1,152 @@
+# app/services/answer_cache.py
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+from app.utils.logger import logger
+from app.utils.metrics import record_cache
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    sources: List[dict]
+    embedding: np.ndarray
+    created_at: float
+
+class AnswerCache:
+    """
+    RAG answer cache with exact and near-duplicate query matching.
+    
+    Entries are scoped by the queried collections and their version (a digest
+    of their chunk ids read from Chroma at query time), so an upload through
+    any worker moves later queries to a fresh scope; `invalidate` only frees
+    this process's stale scopes early. Each scope holds at most `max_entries`
+    and all scopes together at most `max_total_entries`, evicting from the
+    least recently used scope first.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_total_entries: int = 4096,
+        ttl_seconds: float = 3600,
+        similarity_threshold: float = 0.95
+    ):
+        self.max_entries = max_entries
+        self.max_total_entries = max_total_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._collections: "OrderedDict[str, OrderedDict[str, CachedAnswer]]" = OrderedDict()
+        self._total = 0
+    
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Normalize a query for exact matching (case, whitespace, trailing punctuation)."""
+        return re.sub(r"\s+", " ", query).strip().lower().rstrip("?!. ")
+    
+    @staticmethod
+    def scope_key(collection_names: List[str], version: str = "") -> str:
+        """Cache scope for a query over one or more collections at a given version."""
+        scope = "|".join(sorted(set(collection_names)))
+        return f"{scope}@{version}" if version else scope
+    
+    @staticmethod
+    def scope_collections(scope: str) -> List[str]:
+        return scope.split("@", 1)[0].split("|")
+    
+    def _entries(self, scope: str, create: bool = False) -> "OrderedDict[str, CachedAnswer]":
+        """Live entries for a scope, with expired ones dropped."""
+        entries = self._collections.get(scope)
+        if entries is None:
+            if not create:
+                return OrderedDict()
+            entries = self._collections[scope] = OrderedDict()
+        self._collections.move_to_end(scope)
+        cutoff = time.time() - self.ttl_seconds
+        for key in [key for key, entry in entries.items() if entry.created_at < cutoff]:
+            del entries[key]
+            self._total -= 1
+        if not entries and not create:
+            del self._collections[scope]
+        return entries
+    
+    def get_exact(self, scope: str, query: str) -> Optional[CachedAnswer]:
+        """Answer for the same normalized query, if cached."""
+        entries = self._entries(scope)
+        key = self.normalize(query)
+        entry = entries.get(key)
+        record_cache("answers_exact", hit=entry is not None)
+        if entry is None:
+            return None
+        entries.move_to_end(key)
+        return entry
+    
+    def get_similar(self, scope: str, query_embedding: List[float]) -> Optional[Tuple[CachedAnswer, float]]:
+        """Best cached answer whose query embedding is within the similarity threshold."""
+        entries = self._entries(scope)
+        if not entries:
+            record_cache("answers_similar", hit=False)
+            return None
+        
+        keys = list(entries)
+        matrix = np.stack([entries[key].embedding for key in keys])
+        scores = matrix @ self._unit(query_embedding)
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            record_cache("answers_similar", hit=False)
+            return None
+        record_cache("answers_similar", hit=True)
+        
+        entries.move_to_end(keys[best])
+        return entries[keys[best]], float(scores[best])
+    
+    def put(self, scope: str, query: str, query_embedding: List[float], answer: str, sources: List[dict]):
+        """Cache an answer with its sources, evicting least recently used entries past the size bounds."""
+        if not answer.strip():
+            return
+        entries = self._entries(scope, create=True)
+        key = self.normalize(query)
+        self._total += key not in entries
+        entries[key] = CachedAnswer(
+            answer=answer,
+            sources=sources,
+            embedding=self._unit(query_embedding),
+            created_at=time.time()
+        )
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self._total -= 1
+        while self._total > self.max_total_entries:
+            oldest_scope, oldest = next(iter(self._collections.items()))
+            oldest.popitem(last=False)
+            self._total -= 1
+            if not oldest:
+                del self._collections[oldest_scope]
+    
+    def invalidate(self, collection_name: str):
+        """Drop every cached answer for a collection, including multi-collection scopes containing it."""
+        scopes = [scope for scope in self._collections if collection_name in self.scope_collections(scope)]
+        dropped = 0
+        for scope in scopes:
+            entries = self._collections.pop(scope)
+            self._total -= len(entries)
+            dropped += bool(entries)
+        if dropped:
+            logger.info(f"🧹 Answer cache invalidated for collection: {collection_name}")
+    
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+answer_cache = AnswerCache(
+    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+    max_total_entries=settings.ANSWER_CACHE_MAX_TOTAL_ENTRIES,
+    ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+    similarity_threshold=settings.ANSWER_CACHE_SIMILARITY
+)
@@ -1,25 +1,225 @@
 # app/services/competitor_service.py
-from crawl4ai import AsyncWebCrawler
-from app.core.clients import gemini_client
+import time
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlparse, urlunparse, urlencode, parse_qsl
+import httpx
+from app.core.result_cache import scrape_cache, analysis_cache
+from app.models.analysis_schemas import CompetitorAnalysis
+from app.services.crawler_pool import crawler_pool
+from app.services.gemini_service import gemini_service, StructuredOutput
+from app.services.content_packer import content_packer, PackedContent
 from app.config import settings
 from app.utils.logger import logger
+from app.utils.metrics import span
+
+# Bump whenever the analysis prompt changes so cached analyses are not reused
+COMPETITOR_PROMPT_VERSION = "3"
+
+@dataclass
+class CompanyAnalysis:
+    data: dict
+    timing: dict
+    content_report: List[dict]
+    cache_status: dict
 
 class CompetitorService:
     """Service for competitor analysis."""
     
     @staticmethod
-    async def scrape_website(url: str) -> str:
-        """Scrape website content."""
+    def candidate_pages(url: str, result) -> List[str]:
+        """Subpages worth crawling: matching links found on the homepage first, then the configured paths."""
+        root = urlparse(url)
+        wanted = [path.strip("/").lower() for path in settings.COMPETITOR_CRAWL_PATHS]
+        
+        discovered = []
+        links = getattr(result, "links", None) or {}
+        for link in links.get("internal", []):
+            href = link.get("href") if isinstance(link, dict) else link
+            if not href:
+                continue
+            parsed = urlparse(urljoin(url, href))
+            path = parsed.path.strip("/").lower()
+            if parsed.netloc == root.netloc and any(path == name or path.endswith("/" + name) for name in wanted):
+                discovered.append(parsed._replace(query="", fragment="").geturl())
+        
+        fallback = [urljoin(url, path) for path in settings.COMPETITOR_CRAWL_PATHS]
+        
+        pages = []
+        seen = {url.rstrip("/")}
+        for page in discovered + fallback:
+            if page.rstrip("/") not in seen:
+                seen.add(page.rstrip("/"))
+                pages.append(page)
+        return pages[:max(settings.COMPETITOR_CRAWL_MAX_PAGES - 1, 0)]
+    
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        """Cache key for a site: lowercase host, no default port, fragment, tracking params or trailing slash."""
+        parsed = urlparse(url.strip())
+        scheme = (parsed.scheme or "https").lower()
+        host = (parsed.hostname or "").lower()
+        port = parsed.port
+        if port and (scheme, port) not in (("http", 80), ("https", 443)):
+            host = f"{host}:{port}"
+        path = parsed.path.rstrip("/") or "/"
+        query = urlencode(sorted(
+            (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+            if not k.lower().startswith("utm_")
+        ))
+        return urlunparse((scheme, host, path, "", query, ""))
+    
+    @staticmethod
+    def page_record(url: str, result) -> dict:
+        """What the scrape cache keeps per page: markdown plus the validators to revalidate it."""
+        headers = {k.lower(): v for k, v in (getattr(result, "response_headers", None) or {}).items()}
+        markdown = str(result.markdown or "")
+        return {
+            "url": url,
+            "markdown": markdown,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "content_hash": hashlib.sha256(markdown.encode("utf-8")).hexdigest(),
+        }
+    
+    @staticmethod
+    def crawl_error(result) -> Optional[str]:
+        """Why a crawl result is unusable (failed, HTTP error or no content), or None when it is fine."""
+        status = getattr(result, "status_code", None)
+        if not getattr(result, "success", True):
+            return getattr(result, "error_message", None) or "crawl failed"
+        if status and status >= 400:
+            return f"HTTP {status}"
+        if not str(result.markdown or "").strip():
+            return "no content"
+        return None
+    
+    @staticmethod
+    async def fetch_page(url: str) -> Optional[dict]:
+        """Fetch one subpage; missing pages and crawl errors are skipped."""
+        try:
+            result = await crawler_pool.fetch(url)
+        except Exception as e:
+            logger.warning(f"⚠️ Skipping {url}: {e}")
+            return None
+        if CompetitorService.crawl_error(result):
+            return None
+        return CompetitorService.page_record(url, result)
+    
+    @staticmethod
+    async def crawl_site(url: str) -> List[dict]:
+        """
+        Crawl the homepage plus pricing/features/about pages.
+        
+        Raises ValueError when the homepage itself cannot be crawled, so a
+        failed crawl is never cached or analyzed as an empty site.
+        """
         logger.info(f"🌐 Scraping website: {url}")
         
-        async with AsyncWebCrawler(verbose=False) as crawler:
-            result = await crawler.arun(url=url)
+        with span("scrape"):
+            result = await crawler_pool.fetch(url)
+            error = CompetitorService.crawl_error(result)
+            if error:
+                raise ValueError(f"Could not scrape {url}: {error}")
+            pages = [CompetitorService.page_record(url, result)]
             
-        logger.info(f"✅ Scraped {len(result.markdown)} characters")
-        return result.markdown[:30000]  # Limit to 30k chars
+            subpages = CompetitorService.candidate_pages(url, result)
+            records = await asyncio.gather(*[CompetitorService.fetch_page(page) for page in subpages])
+        
+        # Sites often serve the homepage body on /pricing, /about etc.; keep one copy
+        seen = {pages[0]["content_hash"]}
+        for record in records:
+            if record and record["markdown"] and record["content_hash"] not in seen:
+                seen.add(record["content_hash"])
+                pages.append(record)
+        return pages
     
     @staticmethod
-    def analyze_competitor(company_name: str, scraped_content: str) -> dict:
+    async def revalidate(pages: List[dict]) -> bool:
+        """
+        Conditional GET for every cached page. True only when each page has a
+        validator and the server answered 304 Not Modified for all of them;
+        any failure counts as modified.
+        """
+        conditional = []
+        for page in pages:
+            headers = {}
+            if page.get("etag"):
+                headers["If-None-Match"] = page["etag"]
+            if page.get("last_modified"):
+                headers["If-Modified-Since"] = page["last_modified"]
+            if not headers:
+                return False
+            conditional.append((page["url"], headers))
+        
+        # Any error (network, invalid URL, protocol) just means a re-crawl, which is always safe
+        try:
+            with span("revalidate"):
+                async with httpx.AsyncClient(timeout=settings.SCRAPE_REVALIDATE_TIMEOUT, follow_redirects=True) as client:
+                    responses = await asyncio.gather(
+                        *[client.get(url, headers=headers) for url, headers in conditional],
+                        return_exceptions=True
+                    )
+        except Exception as e:
+            logger.warning(f"⚠️ Revalidation failed: {e}")
+            return False
+        
+        errors = [response for response in responses if isinstance(response, Exception)]
+        if errors:
+            logger.warning(f"⚠️ Revalidation failed for {len(errors)} of {len(responses)} pages: {errors[0]!r}")
+            return False
+        return all(response.status_code == 304 for response in responses)
+    
+    @staticmethod
+    def pack_pages(pages: List[dict]) -> PackedContent:
+        with span("pack"):
+            packed = content_packer.pack(
+                [(page["url"], page["markdown"]) for page in pages],
+                settings.COMPETITOR_CONTEXT_TOKENS
+            )
+        for page in packed.report:
+            logger.info(f"   📄 {page['url']}: {page['chars_in']} chars in, {page['chars_kept']} kept")
+        logger.info(f"✅ Scraped {len(pages)} pages, kept {packed.chars_kept}/{packed.chars_in} characters (~{packed.tokens} tokens)")
+        return packed
+    
+    @staticmethod
+    async def scrape_website(url: str) -> Tuple[PackedContent, str]:
+        """
+        Packed site content, served from the scrape cache when possible.
+        
+        Returns:
+            The packed content and the scrape cache status:
+            "hit" (within TTL), "revalidated" (304 after TTL), "refetched" (stale, crawled again) or "miss"
+        """
+        key = CompetitorService.normalize_url(url)
+        entry = await asyncio.to_thread(scrape_cache.get, key)
+        if entry and not (entry["pages"] and entry["pages"][0]["markdown"].strip()):
+            entry = None  # An empty homepage cached before crawl failures were checked
+        
+        if entry and time.time() - entry["fetched_at"] < settings.SCRAPE_CACHE_TTL_SECONDS:
+            logger.info(f"💾 Scrape cache hit: {key}")
+            return CompetitorService.pack_pages(entry["pages"]), "hit"
+        
+        if entry and await CompetitorService.revalidate(entry["pages"]):
+            logger.info(f"💾 Scrape cache revalidated (304): {key}")
+            entry["fetched_at"] = time.time()
+            await asyncio.to_thread(scrape_cache.set, key, entry)
+            return CompetitorService.pack_pages(entry["pages"]), "revalidated"
+        
+        pages = await CompetitorService.crawl_site(url)
+        await asyncio.to_thread(scrape_cache.set, key, {"fetched_at": time.time(), "pages": pages})
+        return CompetitorService.pack_pages(pages), "refetched" if entry else "miss"
+    
+    @staticmethod
+    def analysis_cache_key(company_name: str, content: str) -> str:
+        """Analyses are reused while the company name and packed site content are unchanged."""
+        content_hash = hashlib.sha256(f"{company_name}\n{content}".encode("utf-8")).hexdigest()
+        return f"competitor:{content_hash}:{COMPETITOR_PROMPT_VERSION}:{settings.GENERATIVE_MODEL}"
+    
+    @staticmethod
+    async def analyze_competitor(company_name: str, scraped_content: str) -> StructuredOutput:
         """Analyze competitor using Gemini."""
         logger.info(f"🤖 Analyzing competitor: {company_name}")
         
@@ -50,21 +250,47 @@ Provide a comprehensive competitive analysis in JSON format:
 Output ONLY valid JSON.
 """
         
-        response = gemini_client.models.generate_content(
-            model=settings.GENERATIVE_MODEL,
-            contents=analysis_prompt
-        )
+        return await gemini_service.generate_structured(analysis_prompt, CompetitorAnalysis)
+    
+    @staticmethod
+    async def analyze_company(company_name: str, company_url: str) -> CompanyAnalysis:
+        """Scrape and analyze one company, skipping the crawl and/or Gemini call when cached results still apply."""
+        started = time.perf_counter()
+        scraped, scrape_status = await CompetitorService.scrape_website(company_url)
+        scraped_at = time.perf_counter()
         
-        # Parse JSON
-        raw_text = response.candidates.content.parts.text
-        json_text = raw_text.strip()
+        cache_key = CompetitorService.analysis_cache_key(company_name, scraped.text)
+        analysis_data = await asyncio.to_thread(analysis_cache.get, cache_key)
+        analysis_status = "cached" if analysis_data is not None else "generated"
+        if analysis_data is None:
+            output = await CompetitorService.analyze_competitor(company_name, scraped.text)
+            analysis_data = output.data
+            # A repaired analysis is served once but not cached; the next request regenerates it
+            if not output.repaired:
+                await asyncio.to_thread(analysis_cache.set, cache_key, analysis_data)
+        else:
+            logger.info(f"💾 Content unchanged, reusing analysis for {company_name}")
+        finished = time.perf_counter()
         
-        if json_text.startswith("```json"):
-            json_text = json_text[7:]
-        if json_text.endswith("```"):
-            json_text = json_text[:-3]
+        analysis_data['company_name'] = company_name
+        analysis_data['company_url'] = company_url
+        timing = {
+            "scrape_seconds": round(scraped_at - started, 3),
+            "analyze_seconds": round(finished - scraped_at, 3),
+            "total_seconds": round(finished - started, 3),
+        }
+        skipped = []
+        if scrape_status in ("hit", "revalidated"):
+            skipped.append("crawl")
+        if analysis_status == "cached":
+            skipped.append("analysis")
+        cache_status = {"scrape": scrape_status, "analysis": analysis_status, "skipped": skipped}
         
-        import json
-        return json.loads(json_text.strip())
+        return CompanyAnalysis(
+            data=analysis_data,
+            timing=timing,
+            content_report=scraped.report,
+            cache_status=cache_status
+        )
 
 competitor_service = CompetitorService()
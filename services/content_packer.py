@@ -0,0 +1,195 @@
+# app/services/content_packer.py
+import hashlib
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+from app.utils.tokens import estimate_tokens
+
+# Keywords per field of the competitor analysis schema; a block is worth
+# keeping when it talks about the things the analysis has to fill in.
+SCHEMA_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "company_overview": ("about", "mission", "founded", "company", "team", "headquarter", "we help", "platform"),
+    "business_model": ("subscription", "license", "revenue", "marketplace", "commission", "saas", "per seat", "usage-based"),
+    "target_audience": ("customers", "teams", "enterprise", "small business", "developers", "for startups", "industries", "trusted by"),
+    "key_features": ("feature", "integration", "dashboard", "automation", "analytics", "api", "workflow", "security"),
+    "pricing_strategy": ("pricing", "price", "plan", "tier", "free trial", "per month", "/mo", "/month", "annual", "billed", "$", "€", "£"),
+    "technology_stack": ("built on", "powered by", "cloud", "aws", "kubernetes", "machine learning", "ai", "open source"),
+    "competitive_advantages": ("only", "fastest", "leading", "award", "unlike", "patented", "why choose"),
+    "weaknesses": ("limitation", "not available", "coming soon", "beta", "waitlist"),
+    "recent_news": ("announce", "launch", "release", "raised", "funding", "series", "partnership", "new"),
+}
+
+def keyword_pattern(keywords: Tuple[str, ...]) -> re.Pattern:
+    """
+    One regex per field matching its keywords as whole words ("ai" not in
+    "email", "plan" not in "planned"). Symbol keywords ("$", "/mo") have no
+    word boundary before them, only after a trailing letter ("/mo" not in "/mobile").
+    """
+    alternatives = []
+    for keyword in sorted(keywords, key=len, reverse=True):
+        pattern = re.escape(keyword)
+        if keyword[0].isalnum():
+            pattern = r"\b" + pattern
+        if keyword[-1].isalnum():
+            pattern += r"\b"
+        alternatives.append(pattern)
+    return re.compile("|".join(alternatives))
+
+FIELD_PATTERNS = {name: keyword_pattern(keywords) for name, keywords in SCHEMA_KEYWORDS.items()}
+
+# Pages whose path mentions one of these are more likely to carry dense, relevant content
+PAGE_PRIORS = {"pricing": 2.0, "plans": 2.0, "features": 1.5, "product": 1.5, "about": 1.0, "company": 1.0}
+
+LINK_PATTERN = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+HEADING_PATTERN = re.compile(r"^#{1,6}\s")
+
+@dataclass
+class Block:
+    url: str
+    page_index: int
+    position: int
+    text: str
+    score: float = 0.0
+    
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+@dataclass
+class PackedContent:
+    text: str
+    tokens: int
+    report: List[dict] = field(default_factory=list)
+    
+    @property
+    def chars_in(self) -> int:
+        return sum(page["chars_in"] for page in self.report)
+    
+    @property
+    def chars_kept(self) -> int:
+        return sum(page["chars_kept"] for page in self.report)
+
+class ContentPacker:
+    """Turns several crawled pages into one prompt-sized context of the most relevant blocks."""
+    
+    def __init__(self, max_block_chars: int = 1500):
+        self.max_block_chars = max_block_chars
+    
+    def split_blocks(self, markdown: str) -> List[str]:
+        """Split markdown into paragraph-level blocks, keeping a heading with the text below it."""
+        blocks = []
+        heading = None
+        for paragraph in re.split(r"\n\s*\n", markdown):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if HEADING_PATTERN.match(paragraph) and "\n" not in paragraph:
+                if heading:
+                    blocks.append(heading)
+                heading = paragraph
+                continue
+            if heading:
+                paragraph = f"{heading}\n{paragraph}"
+                heading = None
+            while len(paragraph) > self.max_block_chars:
+                cut = paragraph.rfind("\n", 0, self.max_block_chars)
+                if cut <= 0:
+                    cut = self.max_block_chars
+                blocks.append(paragraph[:cut].strip())
+                paragraph = paragraph[cut:].strip()
+            if paragraph:
+                blocks.append(paragraph)
+        if heading:
+            blocks.append(heading)
+        return blocks
+    
+    @staticmethod
+    def fingerprint(block: str) -> str:
+        """Hash of the block's visible text, so identical nav/footer blocks match across pages."""
+        visible = LINK_PATTERN.sub(r"\1", block).lower()
+        visible = re.sub(r"\s+", " ", visible).strip()
+        return hashlib.sha1(visible.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def is_link_list(block: str) -> bool:
+        """Blocks that are mostly link markup (menus, footers, social icons)."""
+        link_chars = sum(len(m.group(0)) for m in LINK_PATTERN.finditer(block))
+        return len(block) > 0 and link_chars / len(block) > 0.6
+    
+    @staticmethod
+    def score(block: Block) -> float:
+        """Relevance to the analysis schema per token, with a bonus for priority pages and early blocks."""
+        text = block.text.lower()
+        hits = 0.0
+        for pattern in FIELD_PATTERNS.values():
+            hits += min(len(pattern.findall(text)), 3)
+        
+        path = urlparse(block.url).path.lower()
+        prior = max((weight for name, weight in PAGE_PRIORS.items() if name in path), default=0.0)
+        if block.page_index == 0 and block.position < 3:
+            prior += 1.5  # Homepage hero text is the best company overview we get
+        
+        return (hits + prior) / math.sqrt(max(block.tokens, 1))
+    
+    def pack(self, pages: List[Tuple[str, str]], token_budget: int) -> PackedContent:
+        """
+        Dedupe blocks repeated across pages, score what is left and keep the best
+        blocks within `token_budget`, emitted in page/position order.
+        
+        Args:
+            pages: (url, markdown) in crawl order, homepage first
+            token_budget: Approximate tokens of page content to keep
+        """
+        split_pages = [(url, self.split_blocks(markdown or "")) for url, markdown in pages]
+        
+        # A block on more than one page is usually site chrome (nav, footer, cookie
+        # banner), but sites also serve the same body on several URLs. Keep the
+        # first occurrence, ranked down by how many pages repeat it, and drop the rest.
+        seen_on = Counter()
+        for _, blocks in split_pages:
+            seen_on.update({self.fingerprint(block) for block in blocks})
+        
+        candidates: List[Block] = []
+        emitted = set()
+        for page_index, (url, blocks) in enumerate(split_pages):
+            for position, text in enumerate(blocks):
+                key = self.fingerprint(text)
+                if key in emitted or self.is_link_list(text):
+                    continue
+                emitted.add(key)
+                block = Block(url=url, page_index=page_index, position=position, text=text)
+                block.score = self.score(block) / seen_on[key]
+                candidates.append(block)
+        
+        kept: List[Block] = []
+        used = 0
+        for block in sorted(candidates, key=lambda b: b.score, reverse=True):
+            if used + block.tokens > token_budget:
+                continue
+            kept.append(block)
+            used += block.tokens
+        kept.sort(key=lambda b: (b.page_index, b.position))
+        
+        sections = []
+        current_url = None
+        for block in kept:
+            if block.url != current_url:
+                sections.append(f"## Page: {block.url}")
+                current_url = block.url
+            sections.append(block.text)
+        
+        report = []
+        for url, markdown in pages:
+            report.append({
+                "url": url,
+                "chars_in": len(markdown or ""),
+                "chars_kept": sum(len(b.text) for b in kept if b.url == url),
+            })
+        
+        text = "\n\n".join(sections)
+        return PackedContent(text=text, tokens=estimate_tokens(text), report=report)
+
+content_packer = ContentPacker()
@@ -0,0 +1,188 @@
+# app/services/context_assembler.py
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Set, Tuple
+from app.services.retriever import RetrievedChunk
+from app.utils.tokens import estimate_tokens, CHARS_PER_TOKEN
+from app.utils.logger import logger
+
+@dataclass
+class Span:
+    """A continuous stretch of one document, built from one or more retrieved chunks."""
+    collection: Optional[str]
+    page: Optional[int]
+    offset: Optional[int]
+    text: str
+    score: float
+    last_page: Optional[int] = None
+    end_offset: Optional[int] = None  # where the span ends, in `last_page` coordinates
+    chunk_ids: List[str] = field(default_factory=list)
+    
+    @property
+    def pages(self) -> str:
+        if self.page is None:
+            return ""
+        if self.last_page != self.page:
+            return f"pages {self.page}-{self.last_page}"
+        return f"page {self.page}"
+
+@dataclass
+class AssembledContext:
+    spans: List[Span]
+    tokens_in: int
+    tokens_out: int
+    
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_in - self.tokens_out
+
+def shingles(text: str, size: int = 5) -> Set[Tuple[str, ...]]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def text_overlap(left: str, right: str, min_chars: int = 40) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right` (0 if shorter than `min_chars`)."""
+    for size in range(min(len(left), len(right)), min_chars - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+class ContextAssembler:
+    """
+    Rebuilds retrieved chunks into the smallest context that still carries them.
+    
+    Chunks are produced with CHUNK_OVERLAP characters shared between
+    neighbours, so joining them verbatim repeats that text. Chunks from the
+    same page are stitched back together using their stored offsets; chunks
+    on consecutive pages are stitched where their text overlaps. Near-
+    duplicate spans are dropped, the best spans fill the token budget, and
+    the survivors are emitted in document order.
+    """
+    
+    def __init__(self, duplicate_threshold: float = 0.8, max_gap: int = 4):
+        self.duplicate_threshold = duplicate_threshold
+        self.max_gap = max_gap
+    
+    def to_span(self, chunk: RetrievedChunk) -> Span:
+        metadata = chunk.metadata or {}
+        page, offset = metadata.get("page"), metadata.get("offset")
+        return Span(
+            collection=chunk.collection,
+            page=page,
+            offset=offset,
+            text=chunk.text,
+            score=chunk.score,
+            last_page=page,
+            end_offset=None if offset is None else offset + len(chunk.text),
+            chunk_ids=[chunk.id]
+        )
+    
+    def try_merge(self, current: Span, following: Span) -> bool:
+        """Append `following` to `current` when they are continuous text; returns whether it merged."""
+        if current.collection != following.collection or current.page is None or following.page is None:
+            return False
+        if following.offset is None or current.end_offset is None:
+            return False
+        
+        following_end = following.offset + len(following.text)
+        if following.page == current.last_page:
+            # Same page: offsets index into the same page text
+            if following.offset > current.end_offset + self.max_gap:
+                return False
+            overlap = current.end_offset - following.offset
+            if overlap < 0:
+                # Only the whitespace the splitter stripped lies between them
+                current.text += "\n" + following.text
+            elif overlap < len(following.text):
+                current.text += following.text[overlap:]
+            current.end_offset = max(current.end_offset, following_end)
+        elif following.page == current.last_page + 1:
+            # Next page: its first chunk starts inside the carried-over tail of this one
+            overlap = text_overlap(current.text, following.text)
+            if not overlap:
+                return False
+            current.text += following.text[overlap:]
+            current.last_page = following.page
+            current.end_offset = following_end
+        else:
+            return False
+        
+        current.score = max(current.score, following.score)
+        current.chunk_ids.extend(following.chunk_ids)
+        return True
+    
+    def merge_spans(self, chunks: List[RetrievedChunk]) -> List[Span]:
+        """Stitch chunks into continuous spans, per collection in page/offset order."""
+        def position(span: Span):
+            return (
+                span.collection or "",
+                span.page if span.page is not None else float("inf"),
+                span.offset if span.offset is not None else 0
+            )
+        
+        spans = sorted((self.to_span(chunk) for chunk in chunks), key=position)
+        merged: List[Span] = []
+        for span in spans:
+            if merged and self.try_merge(merged[-1], span):
+                continue
+            merged.append(span)
+        return merged
+    
+    def drop_duplicates(self, spans: List[Span]) -> List[Span]:
+        """Drop spans that mostly repeat a higher-scoring span (e.g. the same passage in two documents)."""
+        kept: List[Tuple[Span, Set]] = []
+        for span in sorted(spans, key=lambda s: s.score, reverse=True):
+            grams = shingles(span.text)
+            duplicate = False
+            for _, other in kept:
+                if grams and len(grams & other) / len(grams) >= self.duplicate_threshold:
+                    duplicate = True
+                    break
+            if not duplicate:
+                kept.append((span, grams))
+        return [span for span, _ in kept]
+    
+    def assemble(self, chunks: List[RetrievedChunk], token_budget: int) -> AssembledContext:
+        """
+        Merge, dedupe and budget retrieved chunks.
+        
+        Args:
+            chunks: Retrieved chunks, best first
+            token_budget: Approximate tokens of context to keep
+        """
+        tokens_in = sum(estimate_tokens(chunk.text) for chunk in chunks)
+        spans = self.drop_duplicates(self.merge_spans(chunks))
+        
+        kept: List[Span] = []
+        used = 0
+        for span in spans:  # best first
+            tokens = estimate_tokens(span.text)
+            if used + tokens > token_budget:
+                if kept:
+                    continue
+                # Never return an empty context: trim the best span to fit
+                span.text = span.text[:token_budget * CHARS_PER_TOKEN]
+                tokens = estimate_tokens(span.text)
+            kept.append(span)
+            used += tokens
+        
+        # Collections in order of their best span, then document order within each
+        collection_rank = {}
+        for span in kept:
+            collection_rank.setdefault(span.collection, len(collection_rank))
+        kept.sort(key=lambda s: (
+            collection_rank[s.collection],
+            s.page if s.page is not None else float("inf"),
+            s.offset if s.offset is not None else 0
+        ))
+        
+        context = AssembledContext(spans=kept, tokens_in=tokens_in, tokens_out=used)
+        logger.info(
+            f"🧩 Context: {len(chunks)} chunks -> {len(kept)} spans, "
+            f"~{context.tokens_out} tokens (saved ~{context.tokens_saved})"
+        )
+        return context
+
+context_assembler = ContextAssembler()
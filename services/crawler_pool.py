@@ -0,0 +1,136 @@
+# app/services/crawler_pool.py
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from crawl4ai import AsyncWebCrawler
+from app.config import settings
+from app.utils.logger import logger
+
+# Playwright errors meaning the crawler's browser or page is gone, not just the site
+BROWSER_GONE_MARKERS = ("has been closed", "browser has disconnected", "connection closed", "target crashed")
+
+class BrowserGone(Exception):
+    """A crawl failed because the crawler's browser died; carries the failed result."""
+    
+    def __init__(self, result):
+        super().__init__(getattr(result, "error_message", None) or "browser gone")
+        self.result = result
+
+class CrawlerPool:
+    """Long-lived pool of browser crawlers with a per-domain concurrency limit."""
+    
+    def __init__(self, size: int = 4, per_domain: int = 2):
+        self.size = size
+        self.per_domain = per_domain
+        self._crawlers: List[AsyncWebCrawler] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._domains: Dict[str, asyncio.Semaphore] = {}
+        self._lock = asyncio.Lock()
+    
+    @property
+    def started(self) -> bool:
+        return self._idle is not None
+    
+    async def start(self):
+        """Launch the browsers once so requests don't pay for a launch each."""
+        async with self._lock:
+            if self.started:
+                return
+            logger.info(f"🌐 Launching {self.size} crawler instances...")
+            crawlers = []
+            try:
+                for _ in range(self.size):
+                    crawler = AsyncWebCrawler(verbose=False)
+                    await crawler.start()
+                    crawlers.append(crawler)
+            except Exception:
+                for crawler in crawlers:
+                    await crawler.close()
+                raise
+            
+            self._crawlers = crawlers
+            self._idle = asyncio.Queue()
+            for crawler in crawlers:
+                self._idle.put_nowait(crawler)
+            logger.info("✅ Crawler pool ready")
+    
+    async def close(self):
+        """Shut every browser down."""
+        async with self._lock:
+            for crawler in self._crawlers:
+                try:
+                    await crawler.close()
+                except Exception as e:
+                    logger.warning(f"⚠️ Crawler close failed: {e}")
+            self._crawlers = []
+            self._idle = None
+    
+    @staticmethod
+    def browser_gone(result) -> bool:
+        """Whether a failed crawl result says the browser itself died."""
+        if getattr(result, "success", True):
+            return False
+        error = str(getattr(result, "error_message", "") or "").lower()
+        return any(marker in error for marker in BROWSER_GONE_MARKERS)
+    
+    async def _restart(self, crawler: AsyncWebCrawler) -> AsyncWebCrawler:
+        """Close a broken crawler and launch its replacement (the old one is kept if the launch fails)."""
+        try:
+            await crawler.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Crawler close failed: {e}")
+        replacement = AsyncWebCrawler(verbose=False)
+        try:
+            await replacement.start()
+        except Exception as e:
+            logger.error(f"❌ Crawler restart failed, will retry after its next error: {e}")
+            return crawler
+        if crawler in self._crawlers:
+            self._crawlers[self._crawlers.index(crawler)] = replacement
+        logger.info("🔄 Crawler restarted")
+        return replacement
+    
+    def _domain_semaphore(self, url: str) -> asyncio.Semaphore:
+        domain = urlparse(url).netloc.lower()
+        if domain not in self._domains:
+            self._domains[domain] = asyncio.Semaphore(self.per_domain)
+        return self._domains[domain]
+    
+    @asynccontextmanager
+    async def acquire(self, url: str):
+        """
+        Borrow an idle crawler, respecting the limit for the URL's domain.
+        
+        If the caller's block raises, the crawler may be wedged, so it is
+        restarted before it goes back to the pool.
+        """
+        if not self.started:
+            await self.start()
+        
+        async with self._domain_semaphore(url):
+            crawler = await self._idle.get()
+            try:
+                yield crawler
+            except Exception:
+                crawler = await self._restart(crawler)
+                raise
+            finally:
+                self._idle.put_nowait(crawler)
+    
+    async def fetch(self, url: str, **kwargs):
+        """Crawl one URL on a pooled crawler, restarting the crawler if its browser died."""
+        try:
+            async with self.acquire(url) as crawler:
+                result = await crawler.arun(url=url, **kwargs)
+                if self.browser_gone(result):
+                    raise BrowserGone(result)
+                return result
+        except BrowserGone as e:
+            # The crawler is restarted; the caller still sees an ordinary failed result
+            return e.result
+
+crawler_pool = CrawlerPool(
+    size=settings.CRAWLER_POOL_SIZE,
+    per_domain=settings.CRAWLER_PER_DOMAIN_LIMIT
+)
@@ -0,0 +1,108 @@
+# app/services/embedding_batcher.py
+import asyncio
+import random
+from typing import Awaitable, Callable, List, Optional
+from app.config import settings
+from app.utils.logger import logger
+
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+BatchCallback = Callable[[List[int], List[List[float]]], Awaitable[None]]
+
+class EmbeddingBatcher:
+    """Packs texts into model-sized batches and embeds them concurrently."""
+    
+    def __init__(
+        self,
+        max_items: int = 100,
+        max_chars: int = 100_000,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        retry_base_delay: float = 1.0
+    ):
+        self.max_items = max_items
+        self.max_chars = max_chars
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+    
+    def pack_batches(self, texts: List[str]) -> List[List[int]]:
+        """Group text indices so each batch respects the item and character limits."""
+        batches, current, current_chars = [], [], 0
+        for i, text in enumerate(texts):
+            if current and (len(current) >= self.max_items or current_chars + len(text) > self.max_chars):
+                batches.append(current)
+                current, current_chars = [], 0
+            current.append(i)
+            current_chars += len(text)
+        if current:
+            batches.append(current)
+        return batches
+    
+    @staticmethod
+    def is_rate_limited(error: Exception) -> bool:
+        """Whether an embedding error is a retryable rate-limit/quota error."""
+        if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+            return True
+        message = str(error)
+        return "429" in message or "RESOURCE_EXHAUSTED" in message
+    
+    async def _embed_with_retry(self, embed_fn: EmbedFn, batch: List[str]) -> List[List[float]]:
+        """Embed one batch, backing off exponentially on rate-limit errors."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await embed_fn(batch)
+            except Exception as e:
+                if attempt >= self.max_retries or not self.is_rate_limited(e):
+                    raise
+                delay = self.retry_base_delay * (2 ** attempt) * (1 + random.random())
+                logger.warning(f"⏳ Embedding rate-limited, retrying in {delay:.1f}s (attempt {attempt + 1})")
+                await asyncio.sleep(delay)
+    
+    async def embed(
+        self,
+        texts: List[str],
+        embed_fn: EmbedFn,
+        on_batch: Optional[BatchCallback] = None
+    ) -> List[List[float]]:
+        """
+        Embed all texts; `on_batch` receives each batch's indices and embeddings as it finishes.
+        
+        If any batch fails, the batches still queued or running are cancelled
+        before the error is raised.
+        """
+        batches = self.pack_batches(texts)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        
+        async def run(indices: List[int]):
+            async with semaphore:
+                vectors = await self._embed_with_retry(embed_fn, [texts[i] for i in indices])
+            for i, vector in zip(indices, vectors):
+                embeddings[i] = vector
+            if on_batch:
+                await on_batch(indices, vectors)
+        
+        logger.info(f"📦 Embedding {len(texts)} texts in {len(batches)} batches (concurrency {self.concurrency})")
+        tasks = [asyncio.create_task(run(indices)) for indices in batches]
+        if not tasks:
+            return embeddings
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if not task.cancelled() and task.exception():
+                    raise task.exception()
+        finally:
+            # On the first failure (or our own cancellation) stop sibling batches
+            # so they neither keep calling the API nor write after we return
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return embeddings
+
+embedding_batcher = EmbeddingBatcher(
+    max_items=settings.EMBED_BATCH_MAX_ITEMS,
+    max_chars=settings.EMBED_BATCH_MAX_CHARS,
+    concurrency=settings.EMBED_CONCURRENCY,
+    max_retries=settings.EMBED_MAX_RETRIES,
+    retry_base_delay=settings.EMBED_RETRY_BASE_DELAY
+)
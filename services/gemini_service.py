@@ -1,21 +1,35 @@
 # app/services/gemini_service.py
-import json
-from typing import List
-from app.core.clients import gemini_client
+import re
+import asyncio
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple, Type, TypeVar
+import orjson
+from pydantic import BaseModel, ValidationError
+from app.core.clients import async_gemini_client
+from app.core.embedding_cache import embedding_cache
+from app.services.embedding_batcher import embedding_batcher, BatchCallback
 from app.config import settings
 from app.utils.logger import logger
+from app.utils.metrics import span
+
+T = TypeVar("T", bound=BaseModel)
+
+@dataclass
+class StructuredOutput:
+    data: dict
+    repaired: bool  # built from a truncated response; valid, but not to be cached
 
 class GeminiService:
     """Service for interacting with Gemini API."""
     
     @staticmethod
-    def generate_content(prompt: str, config: dict = None) -> str:
+    async def generate_content(prompt: str, config: dict = None) -> str:
         """Generate content using Gemini."""
         try:
-            response = gemini_client.models.generate_content(
+            response = await async_gemini_client.generate_content(
                 model=settings.GENERATIVE_MODEL,
                 contents=prompt,
-                config=config or {}
+                config=config
             )
             return response.text
         except Exception as e:
@@ -23,32 +37,205 @@ class GeminiService:
             raise
     
     @staticmethod
-    def generate_embeddings(texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for texts."""
-        logger.info(f"🔢 Generating embeddings for {len(texts)} texts...")
-        try:
-            response = gemini_client.models.embed_content(
-                model=settings.EMBEDDING_MODEL,
-                contents=texts
-            )
-            embeddings = [item.values for item in response.embeddings]
-            logger.info(f"✅ Generated {len(embeddings)} embeddings")
+    async def embed_batch(texts: List[str]) -> List[List[float]]:
+        """Embed a single batch of texts with one API call."""
+        response = await async_gemini_client.embed_content(
+            model=settings.EMBEDDING_MODEL,
+            contents=texts
+        )
+        return [item.values for item in response.embeddings]
+    
+    @staticmethod
+    async def generate_embeddings(
+        texts: List[str],
+        on_batch: Optional[BatchCallback] = None
+    ) -> List[List[float]]:
+        """
+        Generate embeddings for texts, serving repeats from the embedding cache.
+        
+        `on_batch(indices, embeddings)` is awaited for the cached texts and then
+        for every embedded batch as soon as it completes.
+        """
+        model = settings.EMBEDDING_MODEL
+        embeddings = await asyncio.to_thread(embedding_cache.get_many, model, texts)
+        
+        cached = [i for i, emb in enumerate(embeddings) if emb is not None]
+        if on_batch and cached:
+            await on_batch(cached, [embeddings[i] for i in cached])
+        
+        # Embed each distinct uncached text once
+        positions = {}
+        for i, emb in enumerate(embeddings):
+            if emb is None:
+                positions.setdefault(texts[i], []).append(i)
+        missing = list(positions)
+        logger.info(f"🔢 Generating embeddings for {len(texts)} texts ({len(cached)} cached)...")
+        if not missing:
             return embeddings
+        
+        async def store(indices: List[int], vectors: List[List[float]]):
+            batch_texts = [missing[i] for i in indices]
+            await asyncio.to_thread(embedding_cache.put_many, model, batch_texts, vectors)
+            
+            text_indices, text_vectors = [], []
+            for text, vector in zip(batch_texts, vectors):
+                for position in positions[text]:
+                    embeddings[position] = vector
+                    text_indices.append(position)
+                    text_vectors.append(vector)
+            if on_batch:
+                await on_batch(text_indices, text_vectors)
+        
+        try:
+            await embedding_batcher.embed(missing, GeminiService.embed_batch, on_batch=store)
         except Exception as e:
             logger.error(f"❌ Embedding generation failed: {e}")
             raise
+        
+        logger.info(f"✅ Generated {len(missing)} embeddings")
+        return embeddings
+    
+    @staticmethod
+    def response_text(response) -> str:
+        """Text of a generation response, joining the first candidate's parts when `.text` is empty."""
+        text = getattr(response, "text", None)
+        if text:
+            return text
+        candidates = getattr(response, "candidates", None) or []
+        if not candidates or not getattr(candidates[0], "content", None):
+            return ""
+        return "".join(part.text or "" for part in candidates[0].content.parts or [])
+    
+    @staticmethod
+    def finish_reason(response) -> Optional[str]:
+        """Why generation stopped ("STOP", "MAX_TOKENS", "SAFETY", ...), or None when not reported."""
+        candidates = getattr(response, "candidates", None) or []
+        reason = getattr(candidates[0], "finish_reason", None) if candidates else None
+        reason = getattr(reason, "name", reason)
+        return None if reason in (None, "FINISH_REASON_UNSPECIFIED") else str(reason)
+    
+    @staticmethod
+    def scan_json(json_text: str) -> Tuple[List[str], bool, bool, int]:
+        """
+        Track brackets and strings through a JSON prefix.
+        
+        Returns the closers still open, whether it ends inside a string (and
+        after a backslash), and the end index of the first complete
+        top-level document (-1 if none closes).
+        """
+        stack, in_string, escaped = [], False, False
+        for i, char in enumerate(json_text):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in "{[":
+                stack.append("}" if char == "{" else "]")
+            elif char in "}]" and stack:
+                stack.pop()
+                if not stack:
+                    return stack, False, False, i + 1
+        return stack, in_string, escaped, -1
     
     @staticmethod
-    def parse_json_response(response_text: str) -> dict:
-        """Parse JSON from Gemini response."""
-        json_text = response_text.strip()
+    def repair_json(json_text: str) -> str:
+        """
+        Close a truncated JSON document: terminate an open string, drop a
+        dangling key, separator or partial literal, and close open brackets.
+        """
+        stack, in_string, escaped, _ = GeminiService.scan_json(json_text)
         
-        # Remove markdown formatting
-        if json_text.startswith("```json"):
-            json_text = json_text[7:]
-        if json_text.endswith("```"):
-            json_text = json_text[:-3]
+        repaired = json_text
+        if in_string:
+            if escaped:
+                repaired = repaired[:-1]
+            repaired += '"'
         
-        return json.loads(json_text.strip())
+        # Partial literals and trailing separators
+        repaired = re.sub(r"(?<=[\[,:])\s*(t|tr|tru|f|fa|fal|fals|n|nu|nul|-)\s*$", "", repaired)
+        repaired = re.sub(r"(\d)[.eE+-]+$", r"\1", repaired)
+        repaired = re.sub(r"[\s,:]+$", "", repaired)
+        # A key whose value never arrived
+        if stack and stack[-1] == "}":
+            repaired = re.sub(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*$', r"\1", repaired)
+            repaired = re.sub(r"[\s,]+$", "", repaired)
+        
+        return repaired + "".join(reversed(stack))
+    
+    @staticmethod
+    def parse_json_response(response_text: str) -> Tuple[Any, bool]:
+        """
+        Parse JSON from a model response with orjson.
+        
+        Markdown fences and text around the document are ignored; a
+        truncated document is repaired rather than rejected.
+        
+        Returns:
+            The parsed document and whether it had to be repaired
+        """
+        json_text = re.sub(r"```(?:json)?", "", response_text).strip()
+        
+        starts = [i for i in (json_text.find("{"), json_text.find("[")) if i >= 0]
+        if not starts:
+            raise ValueError("No JSON object in model response")
+        json_text = json_text[min(starts):]
+        
+        _, _, _, end = GeminiService.scan_json(json_text)
+        if end > 0:
+            return orjson.loads(json_text[:end]), False
+        
+        parsed = orjson.loads(GeminiService.repair_json(json_text))
+        logger.warning(f"⚠️ Repaired truncated JSON response ({len(response_text)} chars)")
+        return parsed, True
+    
+    @staticmethod
+    def parse_structured(response_text: str, schema: Type[T]) -> StructuredOutput:
+        """
+        Parse and validate a response against a schema; raises ValueError when it doesn't fit.
+        
+        A truncated document is repaired and kept when it still has the
+        schema's required content; it is flagged `repaired` so callers serve
+        it without caching it.
+        """
+        try:
+            with span("parse"):
+                parsed, repaired = GeminiService.parse_json_response(response_text)
+                return StructuredOutput(data=schema.model_validate(parsed).model_dump(), repaired=repaired)
+        except ValidationError as e:
+            raise ValueError(f"Response does not match {schema.__name__}: {e}") from e
+    
+    @staticmethod
+    def structured_config(schema: Type[BaseModel]) -> dict:
+        """Generation config asking the model for JSON matching `schema`."""
+        return {"response_mime_type": "application/json", "response_schema": schema}
+    
+    @staticmethod
+    async def generate_structured(prompt: str, schema: Type[T], max_attempts: int = None) -> StructuredOutput:
+        """
+        Generate a response constrained to `schema` and return it parsed.
+        
+        Output that does not validate, even after repair, is retried here, at
+        the generation/parse stage, so callers never redo the scraping or
+        transcription that produced the prompt.
+        """
+        max_attempts = max_attempts or settings.STRUCTURED_OUTPUT_MAX_ATTEMPTS
+        for attempt in range(1, max_attempts + 1):
+            response = await async_gemini_client.generate_content(
+                model=settings.GENERATIVE_MODEL,
+                contents=prompt,
+                config=GeminiService.structured_config(schema)
+            )
+            try:
+                return GeminiService.parse_structured(GeminiService.response_text(response), schema)
+            except ValueError as e:
+                if attempt == max_attempts:
+                    logger.error(f"❌ {schema.__name__} still malformed after {attempt} attempts: {e}")
+                    raise
+                logger.warning(f"⚠️ Malformed {schema.__name__} output (attempt {attempt}/{max_attempts}), retrying: {e}")
 
 gemini_service = GeminiService()
@@ -0,0 +1,195 @@
+# app/services/job_service.py
+import json
+import time
+import uuid
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from app.config import settings
+from app.utils.logger import logger
+
+TERMINAL_STATUSES = {"completed", "failed"}
+
+class Job:
+    """A background job with per-stage progress and timing."""
+    
+    def __init__(self, kind: str, metadata: Optional[dict] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.metadata = metadata or {}
+        self.status = "pending"
+        self.stages: List[Dict[str, Any]] = []
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.persisted = False
+        self._changed = asyncio.Event()
+    
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "metadata": self.metadata,
+            "stages": [dict(stage) for stage in self.stages],
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+    
+    def touch(self):
+        """Record an update and wake anyone watching the job."""
+        self.updated_at = time.time()
+        self._changed.set()
+        self._changed = asyncio.Event()
+    
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """Time a processing stage and publish its progress."""
+        entry = {"name": name, "status": "running", "started_at": time.time(), "finished_at": None, "duration_seconds": None}
+        self.stages.append(entry)
+        self.touch()
+        try:
+            yield
+            entry["status"] = "completed"
+        except BaseException:
+            entry["status"] = "failed"
+            raise
+        finally:
+            entry["finished_at"] = time.time()
+            entry["duration_seconds"] = round(entry["finished_at"] - entry["started_at"], 3)
+            logger.info(f"⏱️ Job {self.id} stage '{name}' {entry['status']} in {entry['duration_seconds']}s")
+            self.touch()
+
+JobHandler = Callable[..., Awaitable[dict]]
+
+class JobService:
+    """Bounded worker pool running queued jobs, with completed results kept on disk."""
+    
+    def __init__(self, store_dir: Path, workers: int = 2, queue_size: int = 100, max_in_memory: int = 500):
+        self.store_dir = Path(store_dir)
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_in_memory = max_in_memory
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+    
+    async def start(self):
+        """Start the worker pool."""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"👷 Job workers started: {self.workers}")
+    
+    async def stop(self):
+        """Cancel the worker pool; running and still-queued jobs are recorded as failed."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while self._queue is not None and not self._queue.empty():
+            job, _, _ = self._queue.get_nowait()
+            self._fail(job, "Cancelled: server shut down before the job started")
+            await self._persist(job)
+    
+    def create(self, kind: str, metadata: Optional[dict] = None) -> Job:
+        """Register a new job that is not yet queued."""
+        job = Job(kind, metadata)
+        self._jobs[job.id] = job
+        self._trim()
+        return job
+    
+    def enqueue(self, job: Job, handler: JobHandler, *args):
+        """Queue a job; `handler(job, *args)` runs on a worker and returns the result."""
+        if self._queue is None:
+            raise RuntimeError("Job workers are not running")
+        job.status = "queued"
+        job.touch()
+        self._queue.put_nowait((job, handler, args))
+    
+    async def get(self, job_id: str) -> Optional[dict]:
+        """Current state of a job, falling back to the on-disk store."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        path = self._path(job_id)
+        if not path.exists():
+            return None
+        return json.loads(await asyncio.to_thread(path.read_text))
+    
+    async def watch(self, job_id: str, timeout: float = 15.0) -> AsyncIterator[dict]:
+        """Yield job snapshots on every update until the job finishes."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            snapshot = await self.get(job_id)
+            if snapshot is not None:
+                yield snapshot
+            return
+        
+        while True:
+            changed = job._changed
+            snapshot = job.to_dict()
+            yield snapshot
+            if snapshot["status"] in TERMINAL_STATUSES:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _worker(self, worker_id: int):
+        while True:
+            job, handler, args = await self._queue.get()
+            try:
+                job.status = "running"
+                job.touch()
+                job.result = await handler(job, *args)
+                job.status = "completed"
+                logger.info(f"✅ Job {job.id} completed")
+            except asyncio.CancelledError:
+                self._fail(job, "Cancelled: server shut down while the job was running")
+                raise
+            except Exception as e:
+                self._fail(job, str(e))
+            finally:
+                job.touch()
+                self._queue.task_done()
+                # Also reached on cancellation, so interrupted jobs reach the disk store
+                await self._persist(job)
+    
+    @staticmethod
+    def _fail(job: Job, error: str):
+        job.status = "failed"
+        job.error = error
+        job.touch()
+        logger.error(f"❌ Job {job.id} failed: {error}")
+    
+    def _path(self, job_id: str) -> Path:
+        return self.store_dir / f"{job_id}.json"
+    
+    async def _persist(self, job: Job):
+        """Keep finished jobs on disk so results can be re-fetched without reprocessing."""
+        try:
+            await asyncio.to_thread(self._path(job.id).write_text, json.dumps(job.to_dict()))
+            job.persisted = True
+        except Exception as e:
+            logger.error(f"❌ Failed to persist job {job.id}: {e}")
+    
+    def _trim(self):
+        """Drop the oldest finished jobs from memory once they are on disk."""
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in TERMINAL_STATUSES and job.persisted
+        ]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_in_memory)]:
+            del self._jobs[job_id]
+
+job_service = JobService(
+    settings.JOB_STORE_DIR,
+    workers=settings.JOB_WORKERS,
+    queue_size=settings.JOB_QUEUE_SIZE
+)
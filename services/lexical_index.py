@@ -0,0 +1,160 @@
+# app/services/lexical_index.py
+import asyncio
+import hashlib
+import math
+import re
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.utils.logger import logger
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9$€£]+(?:[.,%][a-z0-9%]+)*")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word/number tokens; "$2.5M", "ARR" and "Q3" survive as single terms."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def id_hash(doc_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(doc_id.encode("utf-8"), digest_size=8).digest(), "big")
+
+def id_set_digest(ids: List[str]) -> int:
+    """Order-independent digest of a set of chunk ids (XOR of their hashes)."""
+    digest = 0
+    for doc_id in ids:
+        digest ^= id_hash(doc_id)
+    return digest
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring over one collection's chunks."""
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.documents: Dict[str, Tuple[str, Optional[dict]]] = {}
+        self.total_length = 0
+        self.id_digest = 0
+    
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+    
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Optional[dict]] = None):
+        """Index chunks; re-adding an id replaces it."""
+        metadatas = metadatas or [None] * len(ids)
+        for doc_id, text, metadata in zip(ids, texts, metadatas):
+            if doc_id in self.doc_lengths:
+                self.remove([doc_id])
+            terms = Counter(tokenize(text))
+            for term, tf in terms.items():
+                self.postings.setdefault(term, {})[doc_id] = tf
+            length = sum(terms.values())
+            self.doc_lengths[doc_id] = length
+            self.documents[doc_id] = (text, metadata)
+            self.total_length += length
+            self.id_digest ^= id_hash(doc_id)
+    
+    def remove(self, ids: List[str]):
+        for doc_id in ids:
+            if doc_id not in self.doc_lengths:
+                continue
+            text, _ = self.documents.pop(doc_id)
+            for term in set(tokenize(text)):
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(doc_id, None)
+                    if not posting:
+                        del self.postings[term]
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            self.id_digest ^= id_hash(doc_id)
+    
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self) - df + 0.5) / (df + 0.5))
+    
+    def search(self, query: str, k: int = 20) -> List[Tuple[str, float]]:
+        """Top `k` (id, score) pairs for the query terms."""
+        if not self.doc_lengths:
+            return []
+        avg_length = self.total_length / len(self.doc_lengths)
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+class LexicalIndexRegistry:
+    """
+    BM25 indexes per collection, kept in sync with Chroma writes at ingest.
+    
+    An index is built from the collection's stored chunks the first time it
+    is queried (e.g. after a restart); from then on ingest applies adds and
+    deletes to it directly. Ingest only reaches this process, so each query
+    also compares a digest of the index's chunk ids with one of the
+    collection's and rebuilds when another worker has changed the collection.
+    Chunks are only ever added under content-hash ids, never overwritten in
+    place, so equal id sets mean equal contents, even when a re-upload
+    replaced as many chunks as it removed. At most `max_indexes` are kept,
+    least recently used evicted first.
+    """
+    
+    def __init__(self, max_indexes: int = 32):
+        self.max_indexes = max_indexes
+        self._indexes: OrderedDict = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    def _lock(self, name: str) -> asyncio.Lock:
+        return self._locks.setdefault(name, asyncio.Lock())
+    
+    def _store(self, name: str, index: BM25Index):
+        self._indexes[name] = index
+        self._indexes.move_to_end(name)
+        while len(self._indexes) > self.max_indexes:
+            evicted, _ = self._indexes.popitem(last=False)
+            lock = self._locks.get(evicted)
+            if lock is not None and not lock.locked():
+                del self._locks[evicted]
+            logger.info(f"📚 Evicted BM25 index for {evicted}")
+    
+    async def get(self, collection) -> BM25Index:
+        """The collection's index, (re)building it from Chroma when missing or out of date."""
+        async with self._lock(collection.name):
+            index = self._indexes.get(collection.name)
+            if index is not None:
+                stored = await asyncio.to_thread(collection.get, include=[])
+                digest = await asyncio.to_thread(id_set_digest, stored["ids"])
+                if digest == index.id_digest:
+                    self._indexes.move_to_end(collection.name)
+                    return index
+                logger.info(
+                    f"📚 BM25 index for {collection.name} is stale "
+                    f"({len(index)} indexed vs {len(stored['ids'])} stored chunks), rebuilding"
+                )
+            
+            stored = await asyncio.to_thread(collection.get, include=["documents", "metadatas"])
+            index = BM25Index()
+            await asyncio.to_thread(index.add, stored["ids"], stored["documents"], stored["metadatas"])
+            self._store(collection.name, index)
+            logger.info(f"📚 Built BM25 index for {collection.name}: {len(index)} chunks")
+            return index
+    
+    async def add(self, collection_name: str, ids: List[str], texts: List[str], metadatas: List[dict] = None):
+        """Apply chunks just written to Chroma (no-op until the index is first built)."""
+        async with self._lock(collection_name):
+            index = self._indexes.get(collection_name)
+            if index is not None:
+                index.add(ids, texts, metadatas)
+    
+    async def remove(self, collection_name: str, ids: List[str]):
+        """Apply chunks just deleted from Chroma."""
+        async with self._lock(collection_name):
+            index = self._indexes.get(collection_name)
+            if index is not None:
+                index.remove(ids)
+
+lexical_indexes = LexicalIndexRegistry(max_indexes=settings.RAG_LEXICAL_MAX_INDEXES)
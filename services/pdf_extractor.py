@@ -0,0 +1,100 @@
+# app/services/pdf_extractor.py
+import os
+import asyncio
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple
+import fitz
+from app.config import settings
+from app.utils.logger import logger
+from app.utils.metrics import span
+
+def _page_text(doc, page_num: int) -> str:
+    """Extract the text of a single page."""
+    return doc.load_page(page_num).get_text()
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[str]:
+    """Worker entry point: open the PDF in this process and extract pages [start, end)."""
+    doc = fitz.open(pdf_path)
+    try:
+        return [_page_text(doc, page_num) for page_num in range(start, end)]
+    finally:
+        doc.close()
+
+class PDFExtractor:
+    """Page-range-sharded PDF text extraction on a process pool."""
+    
+    def __init__(self, workers: Optional[int] = None, min_parallel_pages: int = 32):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_parallel_pages = min_parallel_pages
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the worker pool on first use."""
+        if self._executor is None:
+            logger.info(f"🧵 Starting PDF extraction pool with {self.workers} workers")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+    
+    def shard(self, page_count: int) -> List[Tuple[int, int]]:
+        """Split pages into contiguous ranges, several per worker so early pages stream out sooner."""
+        shard_size = max(1, -(-page_count // (self.workers * 4)))
+        return [(start, min(start + shard_size, page_count)) for start in range(0, page_count, shard_size)]
+    
+    async def iter_pages(self, pdf_path: str, max_pages: int = None) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (page_num, text) in page order, fanning page ranges out to the pool for large PDFs."""
+        doc = await asyncio.to_thread(fitz.open, pdf_path)
+        page_count = min(max_pages or len(doc), len(doc))
+        
+        # Small documents are not worth the inter-process round trip
+        if self.workers == 1 or page_count < self.min_parallel_pages:
+            try:
+                for page_num in range(page_count):
+                    with span("pdf_extract"):
+                        text = await asyncio.to_thread(_page_text, doc, page_num)
+                    yield page_num, text
+            finally:
+                doc.close()
+            return
+        doc.close()
+        
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        shards = deque(self.shard(page_count))
+        in_flight = deque()
+        
+        def submit():
+            start, end = shards.popleft()
+            future = loop.run_in_executor(executor, _extract_page_range, pdf_path, start, end)
+            in_flight.append((start, future))
+        
+        # Keep a bounded window of shards in flight so memory stays flat
+        try:
+            while shards and len(in_flight) < self.workers * 2:
+                submit()
+            while in_flight:
+                start, future = in_flight.popleft()
+                with span("pdf_extract"):
+                    texts = await future
+                if shards:
+                    submit()
+                for offset, text in enumerate(texts):
+                    yield start + offset, text
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+    
+    def shutdown(self):
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+pdf_extractor = PDFExtractor(
+    workers=settings.PDF_EXTRACT_WORKERS,
+    min_parallel_pages=settings.PDF_PARALLEL_MIN_PAGES
+)
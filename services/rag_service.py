@@ -1,115 +1,402 @@
 # app/services/rag_service.py
-import fitz
 import asyncio
-from typing import List, Dict
+import hashlib
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Dict, Set, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from app.core.clients import gemini_client, chroma_client
+from app.core.clients import async_gemini_client, chroma
+from app.core.embedding_cache import embedding_cache
+from app.services.gemini_service import gemini_service
+from app.services.answer_cache import answer_cache
+from app.services.pdf_extractor import pdf_extractor
+from app.services.lexical_index import lexical_indexes, id_set_digest
+from app.services.retriever import hybrid_retriever, CandidateSet, RetrievalResult, RetrievedChunk
+from app.services.context_assembler import context_assembler
 from app.config import settings
 from app.utils.logger import logger
+from app.utils.metrics import span
+
+text_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=settings.CHUNK_SIZE,
+    chunk_overlap=settings.CHUNK_OVERLAP,
+    length_function=len,
+    add_start_index=True
+)
+
+# Finish reasons of an answer that ran to its end (None: not reported)
+COMPLETE_FINISH_REASONS = (None, "STOP")
+
+@dataclass
+class RAGAnswer:
+    text: str
+    complete: bool  # non-empty and not cut off (max tokens, safety, ...); only complete answers are cached
+
+class AnswerStream:
+    """
+    Answer text as the model streams it. Once iterated to the end, `text`
+    is the whole answer and `complete` tells whether it can be cached.
+    """
+    
+    def __init__(self, chunks: AsyncIterator):
+        self._chunks = chunks
+        self.parts: List[str] = []
+        self.complete = False
+    
+    async def __aiter__(self):
+        finish_reason = None
+        async for chunk in self._chunks:
+            finish_reason = gemini_service.finish_reason(chunk) or finish_reason
+            if chunk.text:
+                self.parts.append(chunk.text)
+                yield chunk.text
+        self.complete = finish_reason in COMPLETE_FINISH_REASONS and bool(self.text.strip())
+    
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
 
 class RAGService:
     """Service for RAG operations."""
     
     @staticmethod
-    async def extract_text_from_pdf(pdf_path: str, max_pages: int = None) -> str:
-        """Extract text from PDF file."""
+    async def iter_pdf_pages(pdf_path: str, max_pages: int = None) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (page_num, text) one page at a time instead of building one document string."""
         logger.info(f"📄 Extracting text from PDF: {pdf_path}")
         
-        def extract():
-            doc = fitz.open(pdf_path)
-            pages_to_process = min(max_pages or len(doc), len(doc))
-            text = ""
-            for page_num in range(pages_to_process):
-                text += doc[page_num].get_text()
-            doc.close()
-            return text
+        pages_extracted, total_chars = 0, 0
+        async for page_num, text in pdf_extractor.iter_pages(pdf_path, max_pages=max_pages):
+            pages_extracted += 1
+            total_chars += len(text)
+            yield page_num, text
         
-        text = await asyncio.to_thread(extract)
-        logger.info(f"✅ Extracted {len(text)} characters from {pdf_path}")
-        return text
+        logger.info(f"✅ Extracted {total_chars} characters from {pages_extracted} pages of {pdf_path}")
     
     @staticmethod
     def chunk_text(text: str) -> List[str]:
         """Split text into chunks."""
         logger.info(f"✂️ Chunking text: {len(text)} characters")
-        
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP,
-            length_function=len
-        )
-        chunks = splitter.split_text(text)
+        chunks = text_splitter.split_text(text)
         logger.info(f"✅ Created {len(chunks)} chunks")
         return chunks
     
+    @staticmethod
+    def chunk_page(page_num: int, text: str, carry: str = "") -> List[Dict]:
+        """
+        Split one page into chunks with stable content-hash ids and page/offset metadata.
+        
+        `carry` is the tail of the previous page; it is prepended so chunks
+        overlap across page boundaries (its offsets are negative).
+        """
+        page_text = carry + text
+        page_hash = hashlib.sha256(page_text.encode("utf-8")).hexdigest()
+        
+        chunks = []
+        with span("chunk"):
+            documents = text_splitter.create_documents([page_text])
+        for doc in documents:
+            offset = doc.metadata["start_index"] - len(carry)
+            chunk_key = f"{page_num}:{offset}:{doc.page_content}"
+            chunks.append({
+                "id": hashlib.sha256(chunk_key.encode("utf-8")).hexdigest()[:32],
+                "text": doc.page_content,
+                "metadata": {"page": page_num, "offset": offset, "page_hash": page_hash}
+            })
+        return chunks
+    
     @staticmethod
     def create_collection(collection_name: str):
         """Create or get ChromaDB collection."""
-        logger.info(f"📦 Creating collection: {collection_name}")
+        logger.info(f"📦 Opening collection: {collection_name}")
+        collection = chroma.get().get_or_create_collection(name=collection_name)
+        logger.info(f"✅ Collection ready: {collection_name}")
+        return collection
+    
+    @staticmethod
+    async def index_document(collection, pages: AsyncIterator[Tuple[int, str]]) -> Dict[str, int]:
+        """
+        Incrementally index a stream of (page_num, text) pages into a collection.
+        
+        A page is skipped only when the chunk ids stored for it are exactly the
+        ids its current text chunks into, so a page left half-written by a
+        failed upload is completed on the next one. Changed pages get their
+        missing chunks embedded and written; new chunks are flushed in batches
+        while later pages are still being extracted, with a bounded number of
+        batches in flight. Old chunks, and chunks of pages that no longer
+        exist, are deleted only after every new chunk has landed, so a failed
+        embed or write never leaves a page with fewer chunks than before.
+        """
+        existing = await asyncio.to_thread(collection.get, include=["metadatas"])
+        
+        stored_pages: Dict[int, Set[str]] = {}
+        stale_ids = []
+        for chunk_id, metadata in zip(existing["ids"], existing["metadatas"]):
+            if not metadata or "page" not in metadata:
+                stale_ids.append(chunk_id)
+                continue
+            stored_pages.setdefault(metadata["page"], set()).add(chunk_id)
+        
+        stats = {"added": 0, "removed": 0, "unchanged": 0}
+        in_flight = asyncio.Semaphore(settings.EMBED_CONCURRENCY)
+        tasks: List[asyncio.Task] = []
+        pending: List[Dict] = []
+        
+        async def write(chunks: List[Dict]):
+            try:
+                await RAGService.add_documents_to_collection(
+                    collection,
+                    [chunk["text"] for chunk in chunks],
+                    ids=[chunk["id"] for chunk in chunks],
+                    metadatas=[chunk["metadata"] for chunk in chunks]
+                )
+            finally:
+                in_flight.release()
+        
+        async def flush():
+            if pending:
+                await in_flight.acquire()
+                tasks.append(asyncio.create_task(write(list(pending))))
+                stats["added"] += len(pending)
+                pending.clear()
         
         try:
-            chroma_client.delete_collection(name=collection_name)
-        except:
-            pass
+            carry = ""
+            async for page_num, text in pages:
+                stored_ids = stored_pages.pop(page_num, set())
+                chunks = RAGService.chunk_page(page_num, text, carry)
+                expected_ids = {chunk["id"] for chunk in chunks}
+                if stored_ids == expected_ids:
+                    stats["unchanged"] += len(stored_ids)
+                else:
+                    # Chunk ids hash page, offset and text, so ids already stored need no re-embedding
+                    pending.extend(chunk for chunk in chunks if chunk["id"] not in stored_ids)
+                    stale_ids.extend(stored_ids - expected_ids)
+                    if len(pending) >= settings.EMBED_BATCH_MAX_ITEMS:
+                        await flush()
+                carry = (carry + text)[-settings.CHUNK_OVERLAP:]
+            
+            # Pages beyond the new page count are gone
+            for stored_ids in stored_pages.values():
+                stale_ids.extend(stored_ids)
+            await flush()
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                # Some new chunks may have landed next to the old ones
+                answer_cache.invalidate(collection.name)
+            raise
         
-        collection = chroma_client.create_collection(name=collection_name)
-        logger.info(f"✅ Collection created: {collection_name}")
-        return collection
+        if stale_ids:
+            with span("chroma_delete"):
+                await asyncio.to_thread(collection.delete, ids=stale_ids)
+            await lexical_indexes.remove(collection.name, stale_ids)
+            stats["removed"] = len(stale_ids)
+        
+        if stats["added"] or stats["removed"]:
+            answer_cache.invalidate(collection.name)
+        
+        logger.info(f"✅ Indexed document: {stats}")
+        return stats
     
     @staticmethod
-    def add_documents_to_collection(collection, chunks: List[str]):
+    async def add_documents_to_collection(
+        collection,
+        chunks: List[str],
+        ids: List[str] = None,
+        metadatas: List[Dict] = None
+    ):
         """Add document chunks to ChromaDB."""
         logger.info(f"💾 Adding {len(chunks)} documents to collection")
+        ids = ids or [f"chunk_{i}" for i in range(len(chunks))]
         
-        # Generate embeddings
-        embeddings = []
-        for i in range(0, len(chunks), 10):
-            batch = chunks[i:i+10]
-            response = gemini_client.models.embed_content(
-                model=settings.EMBEDDING_MODEL,
-                contents=batch
-            )
-            embeddings.extend([item.values for item in response.embeddings])
+        async def write_batch(indices: List[int], embeddings: List[List[float]]):
+            batch_documents = [chunks[i] for i in indices]
+            batch_ids = [ids[i] for i in indices]
+            batch_metadatas = [metadatas[i] for i in indices] if metadatas else None
+            with span("chroma_add"):
+                await asyncio.to_thread(
+                    collection.add,
+                    documents=batch_documents,
+                    embeddings=embeddings,
+                    ids=batch_ids,
+                    metadatas=batch_metadatas
+                )
+            await lexical_indexes.add(collection.name, batch_ids, batch_documents, batch_metadatas)
         
-        # Add to collection
-        collection.add(
-            documents=chunks,
-            embeddings=embeddings,
-            ids=[f"chunk_{i}" for i in range(len(chunks))]
-        )
+        # Embed concurrently (cached chunks skip the API) and write each batch as it lands
+        await gemini_service.generate_embeddings(chunks, on_batch=write_batch)
         logger.info(f"✅ Added {len(chunks)} documents to collection")
+        logger.info(f"📊 Embedding cache: {embedding_cache.stats()}")
+    
+    @staticmethod
+    async def embed_query(query: str) -> List[float]:
+        """Embed a query (served from the embedding cache when repeated)."""
+        return (await gemini_service.generate_embeddings([query]))[0]
+    
+    @staticmethod
+    async def retrieve(
+        collection_name: str,
+        query: str,
+        query_embedding: List[float],
+        top_k: int = None
+    ) -> RetrievalResult:
+        """Hybrid dense + BM25 retrieval from one collection."""
+        collection = await asyncio.to_thread(lambda: chroma.get().get_collection(name=collection_name))
+        result = await hybrid_retriever.retrieve(
+            collection,
+            query,
+            query_embedding,
+            top_k=top_k or settings.RAG_TOP_K
+        )
+        timings = ", ".join(f"{stage.removesuffix('_seconds')} {seconds * 1000:.1f}ms" for stage, seconds in result.timings.items())
+        logger.info(f"✅ Found {len(result.chunks)} relevant chunks in {collection_name} ({timings})")
+        return result
     
     @staticmethod
-    def query_collection(collection_name: str, query: str, n_results: int = 3) -> List[str]:
+    async def gather_candidates(collection_name: str, query: str, query_embedding: List[float]) -> CandidateSet:
+        """Unfused dense + BM25 candidates from one collection, for merging with other collections."""
+        collection = await asyncio.to_thread(lambda: chroma.get().get_collection(name=collection_name))
+        return await hybrid_retriever.gather_candidates(collection, query, query_embedding)
+    
+    @staticmethod
+    async def query_collection(
+        collection_name: str,
+        query: str,
+        n_results: int = None,
+        query_embedding: List[float] = None
+    ) -> List[str]:
         """Query ChromaDB collection."""
         logger.info(f"🔍 Querying collection: {collection_name}")
         
-        collection = chroma_client.get_collection(name=collection_name)
-        
         # Generate query embedding
-        response = gemini_client.models.embed_content(
-            model=settings.EMBEDDING_MODEL,
-            contents=[query]
-        )
-        query_embedding = response.embeddings.values
+        if query_embedding is None:
+            query_embedding = await RAGService.embed_query(query)
+        
+        # Dense + BM25 retrieval, fused and reranked
+        result = await RAGService.retrieve(collection_name, query, query_embedding, top_k=n_results)
+        return [chunk.text for chunk in result.chunks]
+    
+    @staticmethod
+    async def resolve_collections(
+        collection_name: str,
+        collection_names: List[str] = None,
+        collection_prefix: str = None
+    ) -> List[str]:
+        """Collections a query targets: an explicit list, every name with a prefix, or the single default."""
+        if collection_prefix:
+            stored = await asyncio.to_thread(lambda: chroma.get().list_collections())
+            names = sorted(
+                name for name in (getattr(c, "name", c) for c in stored)
+                if name.startswith(collection_prefix)
+            )
+            if not names:
+                raise ValueError(f"No collections match prefix: {collection_prefix}")
+        elif collection_names:
+            names = list(dict.fromkeys(collection_names))
+        else:
+            names = [collection_name]
+        
+        if len(names) > settings.RAG_MAX_COLLECTIONS:
+            raise ValueError(f"At most {settings.RAG_MAX_COLLECTIONS} collections per query, got {len(names)}")
+        return names
+    
+    @staticmethod
+    async def collection_version(collection_names: List[str]) -> str:
+        """
+        Digest of the chunk ids currently stored in the collections.
+        
+        Chunk ids hash their content, so it changes with every upload that adds
+        or removes chunks, whichever worker ran it. Missing collections count
+        as empty.
+        """
+        def read(name: str) -> int:
+            try:
+                collection = chroma.get().get_collection(name=name)
+            except Exception:
+                return 0
+            return id_set_digest(collection.get(include=[])["ids"])
+        
+        digests = await asyncio.gather(*[asyncio.to_thread(read, name) for name in collection_names])
+        key = "|".join(f"{name}:{digest:016x}" for name, digest in sorted(zip(collection_names, digests)))
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    
+    @staticmethod
+    async def query_collections(
+        collection_names: List[str],
+        query: str,
+        query_embedding: List[float],
+        n_results: int = None
+    ) -> List[RetrievedChunk]:
+        """
+        Retrieve from several collections concurrently and rank the union once.
+        
+        Each chunk keeps its collection for attribution. A collection that
+        fails is skipped unless every one of them fails.
+        """
+        logger.info(f"🔍 Querying {len(collection_names)} collections: {collection_names}")
+        if len(collection_names) == 1:
+            result = await RAGService.retrieve(collection_names[0], query, query_embedding, top_k=n_results)
+            return result.chunks
         
-        # Query collection
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results
+        top_k = n_results or settings.RAG_MULTI_TOP_K
+        results = await asyncio.gather(
+            *[RAGService.gather_candidates(name, query, query_embedding) for name in collection_names],
+            return_exceptions=True
         )
         
-        logger.info(f"✅ Found {len(results['documents'])} relevant chunks")
-        return results['documents']
+        candidate_sets: List[CandidateSet] = []
+        failures = []
+        for name, result in zip(collection_names, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"⚠️ Skipping collection {name}: {result}")
+                failures.append(result)
+            else:
+                candidate_sets.append(result)
+        if len(failures) == len(collection_names):
+            raise failures[0]
+        
+        # Per-collection scores are not comparable; fuse and rerank the union once
+        result = hybrid_retriever.merge(query, candidate_sets, top_k=top_k)
+        logger.info(f"✅ Ranked {len(result.chunks)} of {sum(len(found.chunks) for found in candidate_sets)} candidates across collections")
+        return result.chunks
     
     @staticmethod
-    def generate_rag_response(query: str, context_chunks: List[str]) -> str:
-        """Generate response using RAG."""
-        logger.info("🤖 Generating RAG response...")
+    def format_context(chunks: List[RetrievedChunk]) -> List[str]:
+        """
+        Context passages for the prompt: overlapping chunks merged into spans,
+        near-duplicates dropped and the token budget applied. Passages are
+        labelled with their source when several collections are mixed.
+        """
+        context = context_assembler.assemble(chunks, settings.RAG_CONTEXT_TOKENS)
+        if len({span.collection for span in context.spans}) <= 1:
+            return [span.text for span in context.spans]
         
+        labelled = []
+        for span in context.spans:
+            source = f"{span.collection}, {span.pages}" if span.pages else span.collection
+            labelled.append(f"[Source: {source}]\n{span.text}")
+        return labelled
+    
+    @staticmethod
+    def source_attribution(chunks: List[RetrievedChunk]) -> List[Dict]:
+        """Per-chunk source info for API responses."""
+        return [
+            {
+                "collection": chunk.collection,
+                "chunk_id": chunk.id,
+                "page": (chunk.metadata or {}).get("page"),
+                "score": round(chunk.score, 6),
+            }
+            for chunk in chunks
+        ]
+    
+    @staticmethod
+    def build_rag_prompt(query: str, context_chunks: List[str]) -> str:
+        """Build the grounded-answer prompt."""
         context = "\n\n".join(context_chunks)
         
-        prompt = f"""
+        return f"""
 You are a helpful AI assistant. Answer the user's question based on the provided context.
 
 CONTEXT:
@@ -120,12 +407,31 @@ QUESTION:
 
 Provide a clear, accurate answer based on the context. If the context doesn't contain enough information, say so.
 """
+    
+    @staticmethod
+    async def generate_rag_response(query: str, context_chunks: List[str]) -> RAGAnswer:
+        """Generate response using RAG."""
+        logger.info("🤖 Generating RAG response...")
         
-        response = gemini_client.models.generate_content(
+        response = await async_gemini_client.generate_content(
             model=settings.GENERATIVE_MODEL,
-            contents=prompt
+            contents=RAGService.build_rag_prompt(query, context_chunks)
         )
         
-        return response.text
+        text = gemini_service.response_text(response)
+        finish_reason = gemini_service.finish_reason(response)
+        if finish_reason not in COMPLETE_FINISH_REASONS:
+            logger.warning(f"⚠️ RAG answer cut off ({finish_reason}), not caching it")
+        return RAGAnswer(text=text, complete=finish_reason in COMPLETE_FINISH_REASONS and bool(text.strip()))
+    
+    @staticmethod
+    def stream_rag_response(query: str, context_chunks: List[str]) -> AnswerStream:
+        """Stream the RAG answer text as the model produces it."""
+        logger.info("🤖 Streaming RAG response...")
+        
+        return AnswerStream(async_gemini_client.generate_content_stream(
+            model=settings.GENERATIVE_MODEL,
+            contents=RAGService.build_rag_prompt(query, context_chunks)
+        ))
 
 rag_service = RAGService()
@@ -0,0 +1,205 @@
+# app/services/retriever.py
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from app.services.lexical_index import lexical_indexes, tokenize, BM25Index
+from app.config import settings
+from app.utils.metrics import span
+
+@dataclass
+class RetrievedChunk:
+    id: str
+    text: str
+    metadata: Optional[dict]
+    score: float
+    sources: List[str] = field(default_factory=list)  # "dense" and/or "lexical"
+    collection: Optional[str] = None
+    distance: Optional[float] = None  # Chroma distance, for dense hits
+    
+    @property
+    def key(self) -> str:
+        """Unique across collections (chunk ids are only unique within one)."""
+        return f"{self.collection}/{self.id}"
+
+@dataclass
+class RetrievalResult:
+    chunks: List[RetrievedChunk]
+    timings: Dict[str, float]
+
+@dataclass
+class CandidateSet:
+    """Unfused hits from one collection: the dense ranking (by distance), the BM25 ranking and the collection's index."""
+    chunks: Dict[str, RetrievedChunk]
+    dense_keys: List[str]
+    lexical_keys: List[str]
+    index: BM25Index
+    timings: Dict[str, float]
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> Dict[str, float]:
+    """RRF score per id: sum of 1 / (k + rank) over every ranking it appears in."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return scores
+
+def rerank(query: str, chunks: List[RetrievedChunk], index: BM25Index) -> List[RetrievedChunk]:
+    """
+    Cheap local rerank: fused score blended with the idf-weighted share of
+    query terms each chunk contains, so chunks covering every key term
+    ("Series A", "ARR", exact figures) beat ones matching a single term.
+    Chunk scores are replaced by the blended score.
+    """
+    terms = set(tokenize(query))
+    if not terms or not chunks:
+        return chunks
+    weights = {term: index.idf(term) for term in terms}
+    total_weight = sum(weights.values()) or 1.0
+    top_score = max(chunk.score for chunk in chunks) or 1.0
+    
+    for chunk in chunks:
+        chunk_terms = set(tokenize(chunk.text))
+        coverage = sum(weight for term, weight in weights.items() if term in chunk_terms) / total_weight
+        chunk.score = 0.5 * chunk.score / top_score + 0.5 * coverage
+    
+    return sorted(chunks, key=lambda chunk: chunk.score, reverse=True)
+
+class HybridRetriever:
+    """
+    Dense (Chroma) + lexical (BM25) retrieval fused with reciprocal rank
+    fusion and reranked by query-term coverage. RRF alone ranks below BM25
+    alone on the retrieval eval, so the rerank is not optional.
+    """
+    
+    def __init__(self, candidates: int = 20, rrf_k: int = 60):
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+    
+    async def gather_candidates(self, collection, query: str, query_embedding: List[float]) -> CandidateSet:
+        """`candidates` hits from each of the dense and BM25 retrievers over one collection, not yet fused."""
+        timings = {}
+        
+        async def dense():
+            started = time.perf_counter()
+            with span("chroma_query"):
+                results = await asyncio.to_thread(
+                    collection.query,
+                    query_embeddings=[query_embedding],
+                    n_results=self.candidates,
+                    include=["documents", "metadatas", "distances"]
+                )
+            timings["dense_seconds"] = time.perf_counter() - started
+            return results
+        
+        async def lexical():
+            started = time.perf_counter()
+            index = await lexical_indexes.get(collection)
+            with span("bm25_query"):
+                hits = index.search(query, k=self.candidates)
+            timings["lexical_seconds"] = time.perf_counter() - started
+            return index, hits
+        
+        dense_results, (index, lexical_hits) = await asyncio.gather(dense(), lexical())
+        
+        chunks: Dict[str, RetrievedChunk] = {}
+        dense_keys = []
+        dense_ids = dense_results["ids"][0] if dense_results["ids"] else []
+        distances = dense_results["distances"][0] if dense_results.get("distances") else [None] * len(dense_ids)
+        for i, doc_id in enumerate(dense_ids):
+            chunk = RetrievedChunk(
+                id=doc_id,
+                text=dense_results["documents"][0][i],
+                metadata=dense_results["metadatas"][0][i] if dense_results.get("metadatas") else None,
+                score=0.0,
+                sources=["dense"],
+                collection=collection.name,
+                distance=distances[i]
+            )
+            chunks[chunk.key] = chunk
+            dense_keys.append(chunk.key)
+        lexical_keys = []
+        for doc_id, _ in lexical_hits:
+            text, metadata = index.documents[doc_id]
+            chunk = RetrievedChunk(id=doc_id, text=text, metadata=metadata, score=0.0, collection=collection.name)
+            chunk = chunks.setdefault(chunk.key, chunk)
+            chunk.sources.append("lexical")
+            lexical_keys.append(chunk.key)
+        
+        return CandidateSet(chunks=chunks, dense_keys=dense_keys, lexical_keys=lexical_keys, index=index, timings=timings)
+    
+    def fuse(
+        self,
+        query: str,
+        chunks: Dict[str, RetrievedChunk],
+        rankings: List[List[str]],
+        index: BM25Index,
+        top_k: int,
+        timings: Dict[str, float]
+    ) -> RetrievalResult:
+        """RRF over `rankings` (lists of chunk keys), reranked and cut to `top_k`."""
+        started = time.perf_counter()
+        for key, score in reciprocal_rank_fusion(rankings, k=self.rrf_k).items():
+            chunks[key].score = score
+        ranked = sorted(chunks.values(), key=lambda chunk: chunk.score, reverse=True)
+        timings["fuse_seconds"] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        ranked = rerank(query, ranked, index)
+        timings["rerank_seconds"] = time.perf_counter() - started
+        
+        return RetrievalResult(chunks=ranked[:top_k], timings=timings)
+    
+    async def retrieve(
+        self,
+        collection,
+        query: str,
+        query_embedding: List[float],
+        top_k: int = 3
+    ) -> RetrievalResult:
+        """
+        Top `top_k` chunks for a query.
+        
+        Both retrievers return `candidates` hits; their rankings are fused
+        with RRF and reranked before truncating to `top_k`.
+        """
+        found = await self.gather_candidates(collection, query, query_embedding)
+        return self.fuse(
+            query, found.chunks, [found.dense_keys, found.lexical_keys],
+            found.index, top_k, found.timings
+        )
+    
+    def merge(
+        self,
+        query: str,
+        candidate_sets: List[CandidateSet],
+        top_k: int = 3
+    ) -> RetrievalResult:
+        """
+        Fuse and rerank the candidates of several collections once, as one pool.
+        
+        Per-collection fused scores are not comparable (every collection's best
+        chunk scores high however relevant it is), so the union is ranked
+        again: dense hits by distance, which every collection shares because
+        they use the same embedding model, and all candidates with a BM25
+        index over the pool so term statistics are shared too.
+        """
+        started = time.perf_counter()
+        chunks: Dict[str, RetrievedChunk] = {}
+        for found in candidate_sets:
+            chunks.update(found.chunks)
+        
+        dense = [chunk for chunk in chunks.values() if chunk.distance is not None]
+        dense_keys = [chunk.key for chunk in sorted(dense, key=lambda chunk: chunk.distance)]
+        
+        pooled = BM25Index()
+        pooled.add(list(chunks), [chunk.text for chunk in chunks.values()])
+        lexical_keys = [key for key, _ in pooled.search(query, k=len(chunks))]
+        
+        timings = {"pool_seconds": time.perf_counter() - started}
+        return self.fuse(query, chunks, [dense_keys, lexical_keys], pooled, top_k, timings)
+
+hybrid_retriever = HybridRetriever(
+    candidates=settings.RAG_CANDIDATES,
+    rrf_k=settings.RAG_RRF_K
+)
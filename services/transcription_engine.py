@@ -0,0 +1,206 @@
+# app/services/transcription_engine.py
+import os
+import queue
+import asyncio
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Tuple
+import numpy as np
+from app.config import settings
+from app.core.clients import LazyResource, resources
+from app.utils.logger import logger
+from app.utils.metrics import span
+
+# faster_whisper (and CTranslate2 behind it) is imported when first needed, not at startup
+WHISPER_INSTALLED = importlib.util.find_spec("faster_whisper") is not None
+if not WHISPER_INSTALLED:
+    logger.warning("⚠️ Whisper not installed. Video upload disabled.")
+
+SAMPLE_RATE = 16000
+# Extra audio buffered past a segment boundary so the cut can land in silence
+LOOKAHEAD_SECONDS = 10.0
+
+class TranscriptionEngine:
+    """Parallel Whisper transcription over silence-delimited audio segments."""
+    
+    def __init__(
+        self,
+        model_size: str,
+        device: str = "cpu",
+        compute_type: str = "int8",
+        workers: int = 2,
+        cpu_threads: int = 0,
+        segment_seconds: float = 60.0,
+        beam_size: int = 5
+    ):
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.workers = max(1, workers)
+        # Split the cores between model instances so they don't oversubscribe
+        self.cpu_threads = cpu_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.segment_seconds = segment_seconds
+        self.beam_size = beam_size
+        self._models: "queue.Queue" = queue.Queue()
+        self.pool = LazyResource("whisper", self._load_pool)
+    
+    @property
+    def available(self) -> bool:
+        return WHISPER_INSTALLED
+    
+    def _load_pool(self) -> ThreadPoolExecutor:
+        """Load one model instance per worker."""
+        if not self.available:
+            raise RuntimeError("faster-whisper is not installed")
+        from faster_whisper import WhisperModel
+        
+        logger.info(
+            f"🧠 Loading {self.workers} Whisper '{self.model_size}' instances "
+            f"({self.cpu_threads} CPU threads each)..."
+        )
+        for _ in range(self.workers):
+            self._models.put(WhisperModel(
+                self.model_size,
+                device=self.device,
+                compute_type=self.compute_type,
+                cpu_threads=self.cpu_threads
+            ))
+        logger.info("✅ Whisper pool ready")
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="whisper")
+    
+    def _ensure_pool(self) -> ThreadPoolExecutor:
+        """The worker pool, loading the models on first use."""
+        return self.pool.get()
+    
+    def split_on_silence(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        """Group VAD speech spans into segments of about `segment_seconds`, cutting only in silence."""
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+        
+        speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=500))
+        target = int(self.segment_seconds * SAMPLE_RATE)
+        
+        segments: List[Tuple[int, int]] = []
+        for region in speech:
+            start, end = region["start"], region["end"]
+            if segments and end - segments[-1][0] <= target:
+                segments[-1] = (segments[-1][0], end)
+                continue
+            # A single speech region longer than the target is cut at fixed length
+            while end - start > target:
+                segments.append((start, start + target))
+                start += target
+            segments.append((start, end))
+        return segments
+    
+    def find_cut(self, audio: np.ndarray) -> int:
+        """Sample index near `segment_seconds` that falls in the middle of a silence."""
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+        
+        target = int(self.segment_seconds * SAMPLE_RATE)
+        speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=300))
+        
+        gaps = [(prev["end"] + nxt["start"]) // 2 for prev, nxt in zip(speech, speech[1:])]
+        if speech:
+            gaps.append((speech[-1]["end"] + len(audio)) // 2)
+        candidates = [gap for gap in gaps if target // 2 <= gap <= len(audio)]
+        if not candidates:
+            return target
+        return min(candidates, key=lambda gap: abs(gap - target))
+    
+    def _transcribe_segment(self, audio: np.ndarray, offset: float, vad_filter: bool = False) -> List[Dict]:
+        """Transcribe one segment on a pooled model and shift timestamps to the full clip."""
+        model = self._models.get()
+        try:
+            with span("whisper"):
+                segments, _ = model.transcribe(audio, beam_size=self.beam_size, vad_filter=vad_filter)
+                return [
+                    {"start": round(offset + seg.start, 2), "end": round(offset + seg.end, 2), "text": seg.text.strip()}
+                    for seg in segments
+                ]
+        finally:
+            self._models.put(model)
+    
+    async def transcribe_array(self, audio: np.ndarray) -> List[Dict]:
+        """Transcribe 16 kHz mono float32 audio, fanning segments out across the model pool."""
+        if not self.available:
+            raise Exception("Whisper model not initialized")
+        
+        executor = await asyncio.to_thread(self._ensure_pool)
+        spans = await asyncio.to_thread(self.split_on_silence, audio)
+        logger.info(f"🎙️ Transcribing {len(audio) / SAMPLE_RATE:.1f}s of audio in {len(spans)} segments")
+        
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(executor, self._transcribe_segment, audio[start:end], start / SAMPLE_RATE)
+            for start, end in spans
+        ])
+        return [segment for segments in results for segment in segments]
+    
+    async def transcribe_stream(self, chunks: AsyncIterator[np.ndarray]) -> List[Dict]:
+        """
+        Transcribe a stream of 16 kHz mono float32 chunks while it is still being produced.
+        
+        Audio is cut into segments at silences as soon as enough has been
+        buffered, and each segment is handed to the model pool right away.
+        At most two segments per worker are queued so memory stays bounded.
+        """
+        if not self.available:
+            raise Exception("Whisper model not initialized")
+        
+        executor = await asyncio.to_thread(self._ensure_pool)
+        loop = asyncio.get_running_loop()
+        window = int((self.segment_seconds + LOOKAHEAD_SECONDS) * SAMPLE_RATE)
+        in_flight = asyncio.Semaphore(self.workers * 2)
+        futures = []
+        
+        async def submit(audio: np.ndarray, start: int, vad_filter: bool):
+            await in_flight.acquire()
+            future = loop.run_in_executor(
+                executor, self._transcribe_segment, audio, start / SAMPLE_RATE, vad_filter
+            )
+            future.add_done_callback(lambda _: in_flight.release())
+            futures.append(future)
+        
+        buffer = np.zeros(0, dtype=np.float32)
+        offset = 0
+        try:
+            async for chunk in chunks:
+                buffer = np.concatenate([buffer, chunk])
+                while len(buffer) >= window:
+                    cut = await asyncio.to_thread(self.find_cut, buffer[:window])
+                    await submit(buffer[:cut], offset, True)
+                    buffer, offset = buffer[cut:], offset + cut
+            
+            # Whatever is left once the stream ends
+            for start, end in await asyncio.to_thread(self.split_on_silence, buffer):
+                await submit(buffer[start:end], offset + start, False)
+            
+            results = await asyncio.gather(*futures)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        
+        logger.info(f"🎙️ Transcribed {(offset + len(buffer)) / SAMPLE_RATE:.1f}s of streamed audio in {len(futures)} segments")
+        return [segment for segments in results for segment in segments]
+    
+    async def transcribe_file(self, audio_path: str) -> List[Dict]:
+        """Decode an audio file and transcribe it."""
+        if not self.available:
+            raise Exception("Whisper model not initialized")
+        from faster_whisper import decode_audio
+        
+        with span("ffmpeg"):
+            audio = await asyncio.to_thread(decode_audio, audio_path, sampling_rate=SAMPLE_RATE)
+        return await self.transcribe_array(audio)
+
+transcription_engine = TranscriptionEngine(
+    settings.WHISPER_MODEL,
+    device=settings.WHISPER_DEVICE,
+    compute_type=settings.WHISPER_COMPUTE_TYPE,
+    workers=settings.WHISPER_WORKERS,
+    cpu_threads=settings.WHISPER_CPU_THREADS,
+    segment_seconds=settings.WHISPER_SEGMENT_SECONDS,
+    beam_size=settings.WHISPER_BEAM_SIZE
+)
+resources.add(transcription_engine.pool)
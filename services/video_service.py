@@ -2,18 +2,34 @@
 import os
 import uuid
 import asyncio
+import hashlib
+import contextlib
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional
+import numpy as np
 from youtube_transcript_api import YouTubeTranscriptApi
-from app.core.clients import gemini_client, whisper_model
+from app.core.clients import async_gemini_client
+from app.core.result_cache import transcript_cache, analysis_cache
+from app.models.analysis_schemas import PitchAnalysis, WindowSummary
+from app.services.gemini_service import gemini_service, StructuredOutput
+from app.services.transcription_engine import transcription_engine, SAMPLE_RATE
 from app.config import settings
 from app.utils.logger import logger
+from app.utils.metrics import span
+from app.utils.uploads import file_sha256
+
+# Bump whenever the analysis prompt changes so cached analyses are not reused
+ANALYSIS_PROMPT_VERSION = "4"
 
 try:
     import ffmpeg
 except ImportError:
     ffmpeg = None
 
+def _stage(job, name: str):
+    """Job stage context when running as a background job, no-op otherwise."""
+    return job.stage(name) if job else contextlib.nullcontext()
+
 class VideoService:
     """Service for video analysis operations."""
     
@@ -32,72 +48,154 @@ class VideoService:
         return None
     
     @staticmethod
-    def get_youtube_transcript(video_id: str) -> str:
-        """Fetch transcript from YouTube."""
+    def segments_text(segments: List[Dict]) -> str:
+        """Plain transcript text from timed segments."""
+        return " ".join(segment["text"] for segment in segments)
+    
+    @staticmethod
+    async def get_youtube_segments(video_id: str) -> List[Dict]:
+        """Fetch a YouTube transcript as timed segments ({"start", "end", "text"}, seconds)."""
+        cache_key = f"youtube:{video_id}"
+        cached = await asyncio.to_thread(transcript_cache.get, cache_key)
+        if cached is not None and "segments" in cached:
+            logger.info(f"⚡ Transcript served from cache: {video_id}")
+            return cached["segments"]
+        
         logger.info(f"📹 Fetching transcript for video: {video_id}")
         try:
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-            transcript = " ".join([entry['text'] for entry in transcript_list])
+            transcript_list = await asyncio.to_thread(YouTubeTranscriptApi.get_transcript, video_id)
+            segments = [
+                {
+                    "start": round(entry["start"], 2),
+                    "end": round(entry["start"] + entry.get("duration", 0), 2),
+                    "text": entry["text"]
+                }
+                for entry in transcript_list
+            ]
+            transcript = VideoService.segments_text(segments)
             logger.info(f"✅ Transcript fetched: {len(transcript)} characters")
-            return transcript
+            await asyncio.to_thread(transcript_cache.set, cache_key, {"text": transcript, "segments": segments})
+            return segments
         except Exception as e:
             logger.error(f"❌ Failed to fetch transcript: {e}")
             raise
     
     @staticmethod
-    async def extract_audio_from_video(video_path: str, audio_path: str) -> bool:
-        """Extract audio from video file using FFmpeg."""
+    async def get_youtube_transcript(video_id: str) -> str:
+        """Fetch transcript from YouTube."""
+        return VideoService.segments_text(await VideoService.get_youtube_segments(video_id))
+    
+    @staticmethod
+    async def stream_pcm_from_video(video_path: str, chunk_seconds: float = 5.0) -> AsyncIterator[np.ndarray]:
+        """Decode a video's audio with FFmpeg to a pipe, yielding 16 kHz mono float32 chunks."""
         if not ffmpeg:
-            logger.error("❌ FFmpeg not installed")
-            return False
+            raise Exception("FFmpeg not installed")
         
+        args = (
+            ffmpeg.input(video_path)
+            .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=SAMPLE_RATE)
+            .global_args('-loglevel', 'error', '-nostdin')
+            .compile()
+        )
+        logger.info("🎵 Streaming audio from FFmpeg...")
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        
+        chunk_bytes = int(chunk_seconds * SAMPLE_RATE) * 2
         try:
-            logger.info("🎵 Extracting audio with FFmpeg...")
-            await asyncio.to_thread(
-                ffmpeg.input(video_path)
-                .output(audio_path, acodec='mp3', ac=1, ar='16000')
-                .overwrite_output()
-                .run,
-                capture_stdout=True,
-                capture_stderr=True
-            )
-            logger.info("✅ Audio extracted successfully")
-            return True
-        except Exception as e:
-            logger.error(f"❌ FFmpeg extraction failed: {e}")
-            return False
+            while True:
+                with span("ffmpeg"):
+                    try:
+                        data = await process.stdout.readexactly(chunk_bytes)
+                    except asyncio.IncompleteReadError as e:
+                        data = e.partial[:len(e.partial) - len(e.partial) % 2]
+                if data:
+                    yield np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+                if len(data) < chunk_bytes:
+                    break
+            
+            stderr = await process.stderr.read()
+            if await process.wait() != 0:
+                raise Exception(f"FFmpeg extraction failed: {stderr.decode(errors='ignore')[-500:]}")
+            logger.info("✅ Audio stream finished")
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
     
     @staticmethod
-    async def transcribe_audio(audio_path: str) -> str:
-        """Transcribe audio using Whisper."""
-        if not whisper_model:
+    async def transcribe_audio(audio_path: str) -> List[Dict]:
+        """Transcribe audio using Whisper into timed segments."""
+        if not transcription_engine.available:
             raise Exception("Whisper model not initialized")
         
         logger.info("📝 Transcribing audio with Whisper...")
         try:
-            segments, info = await asyncio.to_thread(
-                whisper_model.transcribe,
-                audio_path,
-                beam_size=5
-            )
-            transcript = " ".join([segment.text for segment in segments])
-            logger.info(f"✅ Transcription complete: {len(transcript)} characters")
-            return transcript
+            segments = await transcription_engine.transcribe_file(audio_path)
+            logger.info(f"✅ Transcription complete: {len(VideoService.segments_text(segments))} characters")
+            return segments
         except Exception as e:
             logger.error(f"❌ Transcription failed: {e}")
             raise
     
     @staticmethod
-    def analyze_transcript(transcript: str) -> dict:
-        """Analyze transcript using Gemini."""
-        logger.info("🤖 Analyzing transcript with Gemini...")
+    async def transcribe_video(video_path: str) -> List[Dict]:
+        """Transcribe a video's audio into timed segments, starting while FFmpeg is still decoding it."""
+        if not transcription_engine.available:
+            raise Exception("Whisper model not initialized")
         
-        analysis_prompt = f"""
+        logger.info("📝 Transcribing video audio with Whisper (pipelined)...")
+        try:
+            segments = await transcription_engine.transcribe_stream(
+                VideoService.stream_pcm_from_video(video_path)
+            )
+            logger.info(f"✅ Transcription complete: {len(VideoService.segments_text(segments))} characters")
+            return segments
+        except Exception as e:
+            logger.error(f"❌ Transcription failed: {e}")
+            raise
+    
+    @staticmethod
+    async def process_uploaded_video(video_path: str, filename: str, job=None, sha256: str = None) -> dict:
+        """Run the transcribe -> analyze pipeline for a saved upload, then delete it."""
+        try:
+            # Byte-identical uploads reuse the earlier transcript
+            sha256 = sha256 or await asyncio.to_thread(file_sha256, video_path)
+            cache_key = f"upload:{sha256}"
+            cached = await asyncio.to_thread(transcript_cache.get, cache_key)
+            if cached is not None and "segments" in cached:
+                logger.info("⚡ Transcript served from cache for uploaded video")
+                segments = cached["segments"]
+            else:
+                async with _stage(job, "transcribe"):
+                    segments = await VideoService.transcribe_video(video_path)
+                await asyncio.to_thread(
+                    transcript_cache.set,
+                    cache_key,
+                    {"text": VideoService.segments_text(segments), "segments": segments}
+                )
+            
+            async with _stage(job, "analyze"):
+                analysis_data = await VideoService.analyze_transcript(VideoService.segments_text(segments), segments)
+            
+            analysis_data['filename'] = filename
+            return analysis_data
+        finally:
+            if os.path.exists(video_path):
+                os.remove(video_path)
+    
+    @staticmethod
+    def build_analysis_prompt(transcript: str) -> str:
+        """Build the pitch analysis prompt for a transcript."""
+        return f"""
 You are an expert pitch analyst. Analyze the following video transcript from a pitch presentation.
 
 TRANSCRIPT:
 ---
-{transcript[:15000]}
+{transcript[:settings.TRANSCRIPT_SINGLE_PASS_CHARS]}
 ---
 
 Provide a comprehensive analysis in the following JSON format:
@@ -140,23 +238,187 @@ Provide a comprehensive analysis in the following JSON format:
 Focus on business insights, problem-solution fit, market opportunity, competitive advantages, and traction indicators.
 Output ONLY valid JSON, no markdown code blocks.
 """
+    
+    @staticmethod
+    def analysis_cache_key(transcript: str) -> str:
+        """Cache key for an analysis: transcript hash, prompt version and model."""
+        transcript_hash = hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+        return f"{transcript_hash}:{ANALYSIS_PROMPT_VERSION}:{settings.GENERATIVE_MODEL}"
+    
+    @staticmethod
+    async def get_cached_analysis(transcript: str) -> Optional[dict]:
+        """Previously parsed analysis of this transcript, if cached."""
+        return await asyncio.to_thread(analysis_cache.get, VideoService.analysis_cache_key(transcript))
+    
+    @staticmethod
+    async def cache_analysis(transcript: str, analysis: dict):
+        """Store a parsed analysis for this transcript."""
+        await asyncio.to_thread(analysis_cache.set, VideoService.analysis_cache_key(transcript), analysis)
+    
+    @staticmethod
+    def needs_map_reduce(transcript: str) -> bool:
+        """Transcripts past the single-prompt limit are analyzed window by window."""
+        return len(transcript) > settings.TRANSCRIPT_SINGLE_PASS_CHARS
+    
+    @staticmethod
+    def format_timestamp(seconds: float) -> str:
+        seconds = int(seconds)
+        hours, remainder = divmod(seconds, 3600)
+        minutes, secs = divmod(remainder, 60)
+        return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+    
+    @staticmethod
+    def parse_timestamp(timestamp: str) -> Optional[float]:
+        """Seconds for "m:ss" / "h:mm:ss", or None when it isn't one."""
+        parts = timestamp.strip().split(":")
+        if not 2 <= len(parts) <= 3 or not all(part.isdigit() for part in parts):
+            return None
+        seconds = 0
+        for part in parts:
+            seconds = seconds * 60 + int(part)
+        return float(seconds)
+    
+    @staticmethod
+    def build_windows(segments: List[Dict]) -> List[Dict]:
+        """
+        Group segments into windows aligned to TRANSCRIPT_WINDOW_SECONDS
+        boundaries, so an edit late in a transcript leaves earlier windows
+        (and their cached summaries) untouched. Each window's text carries a
+        timestamp roughly every 15 seconds.
+        """
+        windows: List[Dict] = []
+        current = None
+        line_start = None
+        for segment in segments:
+            index = int(segment["start"] // settings.TRANSCRIPT_WINDOW_SECONDS)
+            if (
+                current is None
+                or index != current["index"]
+                or len(current["text"]) + len(segment["text"]) > settings.TRANSCRIPT_WINDOW_MAX_CHARS
+            ):
+                current = {"index": index, "start": segment["start"], "end": segment["end"], "text": ""}
+                windows.append(current)
+                line_start = None
+            
+            if line_start is None or segment["start"] - line_start >= 15:
+                line_start = segment["start"]
+                prefix = "\n" if current["text"] else ""
+                current["text"] += f"{prefix}[{VideoService.format_timestamp(segment['start'])}] {segment['text']}"
+            else:
+                current["text"] += f" {segment['text']}"
+            current["end"] = max(current["end"], segment["end"])
+        return windows
+    
+    @staticmethod
+    async def summarize_window(window: Dict) -> StructuredOutput:
+        """Map step: structured summary of one window, cached by the window's text."""
+        text_hash = hashlib.sha256(window["text"].encode("utf-8")).hexdigest()
+        cache_key = f"window:{text_hash}:{ANALYSIS_PROMPT_VERSION}:{settings.GENERATIVE_MODEL}"
+        cached = await asyncio.to_thread(analysis_cache.get, cache_key)
+        if cached is not None:
+            return StructuredOutput(data=cached, repaired=False)
         
-        response = gemini_client.models.generate_content(
-            model=settings.GENERATIVE_MODEL,
-            contents=analysis_prompt,
+        prompt = f"""
+You are an expert pitch analyst. Below is one part ({VideoService.format_timestamp(window["start"])} to {VideoService.format_timestamp(window["end"])}) of a longer pitch video transcript. Lines start with their [m:ss] timestamp.
+
+TRANSCRIPT PART:
+---
+{window["text"]}
+---
+
+Summarize this part: what it covers, the claims and facts made, every number mentioned (traction, revenue, market size, funding ask), and notable moments such as slide changes. Notable moment timestamps must be taken from the transcript lines above.
+"""
+        summary = await gemini_service.generate_structured(prompt, WindowSummary)
+        if not summary.repaired:
+            await asyncio.to_thread(analysis_cache.set, cache_key, summary.data)
+        return summary
+    
+    @staticmethod
+    def build_reduce_prompt(windows: List[Dict], summaries: List[dict], duration: float) -> str:
+        """Reduce step prompt: the window summaries in time order."""
+        sections = []
+        for window, summary in zip(windows, summaries):
+            moments = "\n".join(f"  - [{m['timestamp']}] {m['description']}" for m in summary["notable_moments"])
+            sections.append(
+                f"PART {VideoService.format_timestamp(window['start'])}-{VideoService.format_timestamp(window['end'])}\n"
+                f"Summary: {summary['summary']}\n"
+                f"Key points: {'; '.join(summary['key_points'])}\n"
+                f"Numbers: {'; '.join(summary['metrics']) or 'none'}\n"
+                f"Moments:\n{moments or '  - none'}"
+            )
+        parts = "\n\n".join(sections)
+        
+        return f"""
+You are an expert pitch analyst. A {VideoService.format_timestamp(duration)} pitch video was summarized part by part, in time order:
+
+{parts}
+
+Combine these into one analysis of the whole pitch. Give an executive summary, five key insights, four main points and three action items, covering the entire pitch including traction and the ask near the end. For notable_slides pick the most important moments and use their timestamps exactly as listed above; do not invent timestamps. Set duration to {VideoService.format_timestamp(duration)}.
+"""
+    
+    @staticmethod
+    async def map_reduce_analysis(segments: List[Dict]) -> StructuredOutput:
+        """
+        Summarize every window concurrently, then reduce the summaries into one
+        PitchAnalysis (flagged repaired when any step was).
+        """
+        windows = VideoService.build_windows(segments)
+        duration = max(segment["end"] for segment in segments)
+        logger.info(f"🧮 Map-reduce analysis over {len(windows)} windows ({VideoService.format_timestamp(duration)})")
+        
+        summaries = await asyncio.gather(*[VideoService.summarize_window(window) for window in windows])
+        output = await gemini_service.generate_structured(
+            VideoService.build_reduce_prompt(windows, [summary.data for summary in summaries], duration),
+            PitchAnalysis
         )
+        analysis = output.data
         
-        # Parse JSON response
-        raw_text = response.candidates.content.parts.text
-        json_text = raw_text.strip()
+        # Keep only moments that exist in the video
+        analysis["notable_slides"] = [
+            slide for slide in analysis["notable_slides"]
+            if (seconds := VideoService.parse_timestamp(slide["timestamp"])) is not None and seconds <= duration + 1
+        ]
+        analysis["duration"] = VideoService.format_timestamp(duration)
+        return StructuredOutput(data=analysis, repaired=output.repaired or any(summary.repaired for summary in summaries))
+    
+    @staticmethod
+    async def analyze_transcript(transcript: str, segments: List[Dict] = None) -> dict:
+        """
+        Analyze transcript using Gemini.
+        
+        Long transcripts with timed segments go through map-reduce so the
+        whole pitch is covered; others are analyzed in a single prompt.
+        """
+        cached = await VideoService.get_cached_analysis(transcript)
+        if cached is not None:
+            logger.info("⚡ Transcript analysis served from cache")
+            return cached
+        
+        logger.info("🤖 Analyzing transcript with Gemini...")
         
-        # Clean markdown
-        if json_text.startswith("```json"):
-            json_text = json_text[7:]
-        if json_text.endswith("```"):
-            json_text = json_text[:-3]
+        if segments and VideoService.needs_map_reduce(transcript):
+            output = await VideoService.map_reduce_analysis(segments)
+        else:
+            output = await gemini_service.generate_structured(
+                VideoService.build_analysis_prompt(transcript),
+                PitchAnalysis
+            )
+        # A repaired analysis is served once but not cached; the next request regenerates it
+        if not output.repaired:
+            await VideoService.cache_analysis(transcript, output.data)
+        return output.data
+    
+    @staticmethod
+    async def stream_transcript_analysis(transcript: str) -> AsyncIterator[str]:
+        """Stream the raw analysis text as the model produces it."""
+        logger.info("🤖 Streaming transcript analysis with Gemini...")
         
-        import json
-        return json.loads(json_text.strip())
+        async for chunk in async_gemini_client.generate_content_stream(
+            model=settings.GENERATIVE_MODEL,
+            contents=VideoService.build_analysis_prompt(transcript),
+            config=gemini_service.structured_config(PitchAnalysis)
+        ):
+            if chunk.text:
+                yield chunk.text
 
 video_service = VideoService()
@@ -1,35 +1,228 @@
 # app/utils/logger.py
+import atexit
+import copy
 import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, RotatingFileHandler
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import orjson
 from app.config import settings
 
+# LogRecord attributes that are not user-supplied `extra=` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, source location and any `extra=` fields."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        return orjson.dumps(entry, default=str).decode()
+
+class DeferredFlushMixin:
+    """Handler that writes without flushing per record; the listener flushes once per batch."""
+    
+    _in_emit = False
+    
+    def emit(self, record):
+        self._in_emit = True
+        try:
+            super().emit(record)
+        finally:
+            self._in_emit = False
+    
+    def flush(self):
+        if not self._in_emit:
+            super().flush()
+
+class BufferedRotatingFileHandler(DeferredFlushMixin, RotatingFileHandler):
+    pass
+
+class BufferedStreamHandler(DeferredFlushMixin, logging.StreamHandler):
+    pass
+
+class DebugSampler(logging.Filter):
+    """
+    Keep every record at INFO and above, and one in `1 / rate` DEBUG records
+    per call site (the first one always), so chatty debug lines can stay on.
+    """
+    
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counts: Dict[Tuple[str, int], int] = {}
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        if not self.every:
+            return False
+        site = (record.pathname, record.lineno)
+        count = self._counts.get(site, 0)
+        self._counts[site] = count + 1
+        return count % self.every == 0
+
+class BatchingQueueListener:
+    """
+    Writes queued records on a background thread, draining up to `batch_size`
+    at a time and flushing its handlers once per batch. Same start()/stop()
+    contract as logging.handlers.QueueListener: stop() writes what is queued.
+    
+    Formatting holds the GIL, and a thread that holds it keeps it for a whole
+    switch interval (5ms) while the event loop waits. So the writer gives it
+    back whenever it has been writing for `yield_interval` seconds.
+    """
+    
+    _sentinel = None
+    
+    def __init__(self, log_queue, *handlers, batch_size: int = 256, yield_interval: float = 0.0005):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.yield_interval = yield_interval
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        if self._thread is None:
+            return
+        self.queue.put(self._sentinel)
+        self._thread.join()
+        self._thread = None
+    
+    def handle(self, record: logging.LogRecord):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+    
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stopping = False
+            started = time.perf_counter()
+            for record in batch:
+                if record is self._sentinel:
+                    stopping = True
+                    continue
+                self.handle(record)
+                if time.perf_counter() - started >= self.yield_interval:
+                    time.sleep(0)
+                    started = time.perf_counter()
+            for handler in self.handlers:
+                handler.flush()
+            if stopping:
+                return
+
+class LightQueueHandler(QueueHandler):
+    """
+    QueueHandler that only merges the message arguments on the calling thread.
+    
+    The stock prepare() runs a full format() per record before enqueueing; here
+    formatting happens on the listener thread, so past building the LogRecord
+    a logging call costs a record copy, one string merge and a queue put.
+    """
+    
+    def handle(self, record: logging.LogRecord) -> bool:
+        # SimpleQueue.put is thread-safe, so the per-handler lock is not needed
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Copy like the stock prepare(): other handlers (root, propagated, pytest's
+        # caplog) may see the same record and still need its args and exc_info
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks reference frames that may change before the listener runs
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def create_queue_pipeline(
+    handlers: List[logging.Handler],
+    batch_size: int = 256,
+    debug_sample_rate: float = 1.0
+) -> Tuple[LightQueueHandler, BatchingQueueListener]:
+    """
+    A QueueHandler for loggers plus the listener that writes its records on a
+    background thread. Logging calls only enqueue, so file and console I/O
+    never run on the event loop. The caller starts and stops the listener.
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = LightQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampler(debug_sample_rate))
+    listener = BatchingQueueListener(log_queue, *handlers, batch_size=batch_size)
+    return queue_handler, listener
+
+def build_handlers(log_file: Path) -> List[logging.Handler]:
+    """JSON lines to a size-rotated file and readable lines to the console."""
+    file_handler = BufferedRotatingFileHandler(
+        log_file,
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
+        encoding="utf-8"
+    )
+    file_handler.setFormatter(JSONFormatter())
+    
+    console_handler = BufferedStreamHandler()
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    return [file_handler, console_handler]
+
+_listener: Optional[BatchingQueueListener] = None
+
 def setup_logger(name: str = __name__) -> logging.Logger:
-    """Configure and return a logger instance."""
+    """Configure and return a logger instance writing through the background log pipeline."""
+    global _listener
     
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    logger.setLevel(settings.LOG_LEVEL)
     
     # Avoid adding handlers multiple times
     if logger.handlers:
         return logger
     
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    
-    # File handler
-    file_handler = logging.FileHandler(settings.LOG_FILE)
-    file_handler.setLevel(logging.INFO)
-    
-    # Formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    queue_handler, _listener = create_queue_pipeline(
+        build_handlers(settings.LOG_FILE),
+        batch_size=settings.LOG_BATCH_SIZE,
+        debug_sample_rate=settings.LOG_DEBUG_SAMPLE_RATE
     )
-    console_handler.setFormatter(formatter)
-    file_handler.setFormatter(formatter)
+    logger.addHandler(queue_handler)
+    _listener.start()
+    # Drain and flush whatever is still queued when the process exits
+    atexit.register(_listener.stop)
     
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # Per-logger levels (child loggers such as "ai_analyst.rag" share the pipeline)
+    for logger_name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(logger_name).setLevel(level)
     
     return logger
 
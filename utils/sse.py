@@ -0,0 +1,16 @@
+# app/utils/sse.py
+import json
+from typing import AsyncIterator
+from fastapi.responses import StreamingResponse
+
+def format_sse(event: str, data) -> str:
+    """Encode one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Wrap an async iterator of formatted events in an unbuffered SSE response."""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,9 @@
+# app/utils/tokens.py
+import math
+
+# Rough average for English prose with Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count without a tokenizer round trip."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
@@ -0,0 +1,127 @@
+# app/utils/uploads.py
+import os
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from app.config import settings
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds its size limit."""
+
+@dataclass
+class SavedUpload:
+    path: Path
+    size: int
+    sha256: str
+
+async def save_upload(
+    file: UploadFile,
+    destination: Path,
+    max_bytes: int = None,
+    chunk_size: int = None
+) -> SavedUpload:
+    """
+    Stream an upload to disk in fixed-size chunks, hashing it on the fly.
+    
+    Only one chunk is held in memory at a time. The partial file is removed
+    and UploadTooLarge raised as soon as `max_bytes` is exceeded.
+    """
+    max_bytes = max_bytes or settings.MAX_UPLOAD_SIZE
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+    
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with open(destination, "wb") as f:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+    except BaseException:
+        if os.path.exists(destination):
+            os.remove(destination)
+        raise
+    
+    return SavedUpload(path=Path(destination), size=written, sha256=digest.hexdigest())
+
+def file_sha256(path, chunk_size: int = None) -> str:
+    """SHA-256 of a file on disk, read in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size or settings.UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject multipart request bodies over their route's limit before they are parsed.
+    
+    `limits` maps request paths to byte limits; other multipart requests get
+    `default_max_bytes`. A declared Content-Length over the limit is refused
+    immediately; chunked bodies are counted as they arrive and cut off once
+    they cross it. Either way the client gets the routes' usual error body.
+    """
+    
+    def __init__(self, app, limits: Dict[str, int], default_max_bytes: int):
+        self.app = app
+        self.limits = limits
+        self.default_max_bytes = default_max_bytes
+    
+    @staticmethod
+    def too_large(max_bytes: int) -> JSONResponse:
+        return JSONResponse(
+            status_code=413,
+            content={"success": False, "error": f"Upload exceeds {max_bytes} bytes"}
+        )
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            return await self.app(scope, receive, send)
+        
+        max_bytes = self.limits.get(scope["path"].rstrip("/") or "/", self.default_max_bytes)
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            return await self.too_large(max_bytes)(scope, receive, send)
+        
+        received = 0
+        exceeded = False
+        response_started = False
+        
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    exceeded = True
+                    # Only an HTTPException gets through FastAPI's body parsing unchanged
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+            return message
+        
+        async def limited_send(message):
+            nonlocal response_started
+            # Swap the framework's {"detail": ...} 413 for our own body
+            if exceeded and not response_started:
+                return
+            response_started = response_started or message["type"] == "http.response.start"
+            await send(message)
+        
+        await self.app(scope, limited_receive, limited_send)
+        if exceeded and not response_started:
+            await self.too_large(max_bytes)(scope, receive, send)